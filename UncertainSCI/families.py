@@ -106,13 +106,18 @@ def jacobi_idist_driver(x, n, alpha, beta, M):
     else:
         kn_factor = np.exp(-1/n * np.sum(np.log(ab[:, 1]**2)))
 
+    # The (0, beta) coefficients every point starts from do not depend on
+    # x, so they are computed once. The modifications below return new
+    # arrays, so ab_J itself is never overwritten (as in hfreud_idist_driver).
+    ab_J = jacobi_recurrence_values(n+A+M, 0, beta)
+    ab_J[0, 1] = 1.
+
     for ind in range(x.size):
         if x[ind] == -1:
             F[ind] = 0
             continue
 
-        ab = jacobi_recurrence_values(n+A+M, 0, beta)
-        ab[0, 1] = 1.
+        ab = ab_J
 
         if n > 0:
             un = (2./(x[ind]+1.)) * (xn + 1.) - 1.
@@ -366,11 +371,12 @@ class JacobiPolynomials(OrthogonalPolynomialBasis1D):
         else:
 
             nmax = np.amax(n)
-            ind = np.digitize(n, np.arange(-0.5, 0.5+nmax+1e-8), right=False)
+            # Only the degrees that actually occur in n are inverted
+            degrees, ind = np.unique(n, return_inverse=True)
 
             ab = self.recurrence_driver(2*nmax + M+1)
-            for i in range(nmax+1):
-                flags = ind == i+1
+            for k, i in enumerate(degrees.tolist()):
+                flags = ind == k
 
                 def primitive(xx):
                     return self.idist(xx, i, M=M)
@@ -893,13 +899,14 @@ def hfreud_idistinv(u, n, alpha, rho):
         x = idistinv_driver(u, n, primitive, ab, supp)
     else:
         nmax = np.amax(n)
-        ind = np.digitize(n, np.arange(-0.5, 0.5+nmax+1e-8), right=False)
+        # Only the degrees that actually occur in n are inverted
+        degrees, ind = np.unique(n, return_inverse=True)
         ab = laguerre_recurrence_values(2*nmax + max(100, nmax), alpha, rho)
 
         assert n.size == u.size
 
         x = np.zeros(n.shape)
-        for qq in range(nmax+1):
+        for k, qq in enumerate(degrees.tolist()):
             rhs = 1.2 * hfreud_idist_medapprox(qq, alpha, rho)[0]
 
             U = max(u)
@@ -910,7 +917,7 @@ def hfreud_idistinv(u, n, alpha, rho):
 
             supp = [0, rhs]
 
-            flags = ind == qq+1
+            flags = ind == k
 
             def primitive(xx):
                 return hfreud_idist(xx, qq, alpha, rho)
@@ -1030,9 +1037,13 @@ class DiscreteChebyshevPolynomials(OrthogonalPolynomialBasis1D):
 
         return ab
 
+    def _standardize(self, x):
+
+        return self.transform_to_standard.map(x)
+
     def eval(self, x, n, **options):
 
-        return super().eval(self.transform_to_standard.map(x), n, **options)
+        return super().eval(self._standardize(x), n, **options)
 
     def idist(self, x, n, nugget=False):
         """
@@ -6,10 +6,11 @@ Contains classes/methods for general univariate orthogonal polynomial families.
 - linear/quadratic measure modifications
 """
 
+from math import sqrt
+
 import numpy as np
 from scipy import special as sp
-from numpy.linalg import eigh
-from scipy import optimize
+from scipy.linalg import eigh_tridiagonal
 from scipy.special import gammaln
 
 
@@ -23,16 +24,50 @@ def eval_driver(x, n, d, ab):
 
     nmax = np.max(n)
 
-    p = np.zeros(x.shape + (nmax+1,))
     xf = x.flatten()
 
-    p[:, 0] = 1/ab[0, 1]
+    # The recurrence runs over degree-major rows of a C-contiguous buffer,
+    # updated in place with out= ufuncs and one preallocated scratch row, so
+    # that each step streams through contiguous memory without allocating;
+    # p is the x.size x (nmax+1) view of it. The coefficients are pulled out
+    # as Python floats (with 1/b precomputed) to avoid numpy scalar overhead
+    # in the loop. The operations are ordered as in the direct formula
+    # p_j = 1/b_j * ((x - a_j)*p_{j-1} - b_{j-1}*p_{j-2}), so the results
+    # match it bit for bit.
+    a = ab[:(nmax+1), 0].tolist()
+    b = ab[:(nmax+1), 1].tolist()
+    binv = (1/ab[:(nmax+1), 1]).tolist()
+
+    if xf.size == 1:
+        # Scalar x: the same recurrence on Python floats, which is much
+        # cheaper than dispatching ufuncs on length-1 rows.
+        x0 = float(xf[0])
+        ps = [binv[0]]
+        if nmax > 0:
+            ps.append(binv[1]*((x0 - a[1])*binv[0]))
+        for j in range(2, nmax+1):
+            ps.append(((x0 - a[j])*ps[j-1] - b[j-1]*ps[j-2])*binv[j])
+        P = np.array(ps).reshape([nmax+1, 1])
 
-    if nmax > 0:
-        p[:, 1] = 1/ab[1, 1] * ((xf - ab[1, 0])*p[:, 0])
+    else:
+        P = np.empty([nmax+1, xf.size])
+        P[0, :] = binv[0]
+
+        if nmax > 0:
+            np.subtract(xf, a[1], out=P[1, :])
+            P[1, :] *= binv[0]
+            P[1, :] *= binv[1]
+
+        tmp = np.empty(xf.size)
+        for j in range(2, nmax+1):
+            pj = P[j, :]
+            np.subtract(xf, a[j], out=pj)
+            pj *= P[j-1, :]
+            np.multiply(P[j-2, :], b[j-1], out=tmp)
+            pj -= tmp
+            pj *= binv[j]
 
-    for j in range(2, nmax+1):
-        p[:, j] = 1/ab[j, 1] * ((xf - ab[j, 0])*p[:, j-1] - ab[j-1, 1]*p[:, j-2])
+    p = P.T
 
     if type(d) == int:
         d = [d]
@@ -56,22 +91,27 @@ def eval_driver(x, n, d, ab):
 
     assign_p_d(0, p)
 
+    # Partial sums of log(b[j]), shared by the starting values of every
+    # derivative order below.
+    if max(d) > 0:
+        logb = np.cumsum(np.log(ab[:(nmax+1), 1]))
+
     for qd in range(1, max(d)+1):
 
-        pd = np.zeros(p.shape)
-
-        for qn in range(qd, nmax+1):
-            if qn == qd:
-                # The following is an over/underflow-resistant way to
-                # compute ( qd! * kappa_{qd} ), where qd is the
-                # derivative order and kappa_{qd} is the leading-order
-                # coefficient of the degree-qd orthogonal polynomial.
-                # The explicit formula for the lading coefficient of the
-                # degree-qd orthonormal polynomial is prod(1/b[j]) for
-                # j=0...qd.
-                pd[:, qn] = np.exp(sp.gammaln(qd+1) - np.sum(np.log(ab[:(qd+1), 1])))
-            else:
-                pd[:, qn] = 1/ab[qn, 1] * ((xf - ab[qn, 0]) * pd[:, qn-1] - ab[qn-1, 1] * pd[:, qn-2] + qd*p[:, qn-1])
+        pd = np.zeros([nmax+1, xf.size]).T
+
+        if qd <= nmax:
+            # The following is an over/underflow-resistant way to
+            # compute ( qd! * kappa_{qd} ), where qd is the
+            # derivative order and kappa_{qd} is the leading-order
+            # coefficient of the degree-qd orthogonal polynomial.
+            # The explicit formula for the lading coefficient of the
+            # degree-qd orthonormal polynomial is prod(1/b[j]) for
+            # j=0...qd.
+            pd[:, qd] = np.exp(sp.gammaln(qd+1) - logb[qd])
+
+        for qn in range(qd+1, nmax+1):
+            pd[:, qn] = 1/ab[qn, 1] * ((xf - ab[qn, 0]) * pd[:, qn-1] - ab[qn-1, 1] * pd[:, qn-2] + qd*p[:, qn-1])
 
         assign_p_d(qd, pd)
 
@@ -82,6 +122,29 @@ def eval_driver(x, n, d, ab):
     else:
         return preturn
 
+def eval_pair_driver(x, n, ab):
+    """
+    Evaluates the degree-n and degree-(n+1) orthonormal polynomials given
+    their three-term recurrence coefficients ab. (Requires ab.shape[0] >=
+    n+2.)
+
+    Only two rolling vectors are kept during the recurrence, instead of the
+    x.size x (n+2) table formed by eval_driver.
+
+    Returns a tuple (p_n, p_{n+1}) of arrays of size x.size.
+    """
+
+    xf = np.asarray(x, dtype=float).flatten()
+
+    pprev = np.zeros(xf.size)
+    p = np.full(xf.size, 1/ab[0, 1])
+
+    for j in range(1, n+2):
+        pprev, p = p, 1/ab[j, 1] * ((xf - ab[j, 0])*p - ab[j-1, 1]*pprev)
+
+    return pprev, p
+
+
 def leading_coefficient_driver(N, ab):
     """
     Returns the leading coefficients for the first N polynomial basis elements.
@@ -99,15 +162,31 @@ def ratio_driver(x, n, d, ab):
     """
     nmax = np.max(n)
 
-    r = np.zeros([x.size, nmax+1])
     xf = x.flatten()
 
-    r[:, 0] = 1/ab[0, 1]
-    if nmax > 0:
-        r[:, 1] = 1/ab[1, 1] * (x - ab[1, 0])
+    if xf.size == 1:
+        # Scalar x (e.g. from linear_modification): run the recurrence on
+        # scalars instead of length-1 columns. x0 stays a numpy scalar so
+        # that a vanishing ratio gives inf rather than raising.
+        x0 = xf[0]
+        a = ab[:(nmax+1), 0].tolist()
+        b = ab[:(nmax+1), 1].tolist()
+        rs = [1/b[0]]
+        if nmax > 0:
+            rs.append(1/b[1] * (x0 - a[1]))
+        for j in range(2, nmax+1):
+            rs.append(1/b[j] * ((x0 - a[j]) - b[j-1]/rs[j-1]))
+        r = np.array([rs], dtype=float)
+
+    else:
+        r = np.zeros([x.size, nmax+1])
+
+        r[:, 0] = 1/ab[0, 1]
+        if nmax > 0:
+            r[:, 1] = 1/ab[1, 1] * (x - ab[1, 0])
 
-    for j in range(2, nmax+1):
-        r[:, j] = 1/ab[j, 1] * ((xf - ab[j, 0]) - ab[j-1, 1]/r[:, j-1])
+        for j in range(2, nmax+1):
+            r[:, j] = 1/ab[j, 1] * ((xf - ab[j, 0]) - ab[j-1, 1]/r[:, j-1])
 
     r = r[:, n.flatten()]
 
@@ -135,9 +214,26 @@ def s_driver(x, n, ab):
     Need {a_k, b_k} k up to n
     """
 
-    xf = x.flatten()
+    xf = np.asarray(x).flatten()
     nmax = np.max(n)
 
+    if xf.size == 1:
+        # Scalar x (e.g. from quadratic_modification): the same recurrence
+        # on Python floats, avoiding numpy dispatch on length-1 columns.
+        x0 = float(xf[0])
+        a = ab[:(nmax+1), 0].tolist()
+        b = ab[:(nmax+1), 1].tolist()
+        ss = [1 / b[0]]
+        if nmax > 0:
+            ss.append(1 / b[1] * (x0 - a[1]))
+        if nmax > 1:
+            den1 = sqrt(1 + ss[1]*ss[1])
+            ss.append(1 / den1 * ((x0 - a[2]) * ss[1] - b[1]) / b[2])
+        for j in range(3, nmax+1):
+            den2, den1 = den1, sqrt(1 + ss[j-1]*ss[j-1])
+            ss.append(1 / den1 * ((x0 - a[j]) * ss[j-1] - b[j-1] * ss[j-2] / den2) / b[j])
+        return np.array([ss])[:, np.asarray(n).flatten()]
+
     s = np.zeros((xf.size, nmax+1))
 
     s[:, 0] = 1 / ab[0, 1]
@@ -145,13 +241,17 @@ def s_driver(x, n, ab):
     if nmax > 0:
         s[:, 1] = 1 / ab[1, 1] * (x - ab[1, 0])
 
+    # Each denominator sqrt(1 + s_j^2) is used at steps j+1 and j+2, so the
+    # two most recent ones are carried along rather than recomputed.
     if nmax > 1:
-        s[:, 2] = 1 / np.sqrt(1 + s[:, 1]**2) * ((x - ab[2, 0]) * s[:, 1] - ab[1, 1])
+        den1 = np.sqrt(1 + s[:, 1]**2)
+        s[:, 2] = 1 / den1 * ((x - ab[2, 0]) * s[:, 1] - ab[1, 1])
         s[:, 2] = s[:, 2] / ab[2, 1]
 
     for j in range(3, nmax+1):
-        s[:, j] = 1 / np.sqrt(1 + s[:, j-1]**2) * \
-                  ((x - ab[j, 0]) * s[:, j-1] - ab[j-1, 1] * s[:, j-2] / np.sqrt(1 + s[:, j-2]**2))
+        den2, den1 = den1, np.sqrt(1 + s[:, j-1]**2)
+        s[:, j] = 1 / den1 * \
+                  ((x - ab[j, 0]) * s[:, j-1] - ab[j-1, 1] * s[:, j-2] / den2)
         s[:, j] = s[:, j] / ab[j, 1]
 
     return s[:, n.flatten()]
@@ -166,16 +266,41 @@ def jacobi_matrix_driver(ab, N):
     return np.diag(ab[1:N, 1], k=1) + np.diag(ab[1:(N+1), 0], k=0) + np.diag(ab[1:N, 1], k=-1)
 
 
+def apply_jacobi_matrix_driver(ab, v, out=None):
+    """
+    Premultiplies v by the N x N jacobi matrix associated to the input
+    recurrence coefficients ab, where N = v.shape[0]. The matrix is applied
+    across the first dimension of v. (Requires ab.shape[0] >= N+1.)
+
+    If out is given, the product is written into it; out must have the shape
+    of v and must not overlap v.
+    """
+
+    N = v.shape[0]
+    bshape = (-1,) + (1,)*(v.ndim-1)
+    a = ab[1:(N+1), 0].reshape(bshape)
+    b = ab[1:N, 1].reshape(bshape)
+
+    if out is None:
+        out = np.empty(v.shape)
+
+    np.multiply(v, a, out=out)
+    out[:-1] += v[1:]*b
+    out[1:] += v[:-1]*b
+
+    return out
+
+
 def gauss_quadrature_driver(ab, N):
     """
     Computes the N-point Gauss quadrature rule associated to the
     recurrence coefficients ab. (Requires ab.shape[0] >= N+1.)
     """
 
-    from numpy.linalg import eigh
-
     if N > 0:
-        lamb, v = eigh(jacobi_matrix_driver(ab, N))
+        # The Jacobi matrix is symmetric tridiagonal, so hand the diagonals
+        # directly to the tridiagonal eigensolver instead of forming it.
+        lamb, v = eigh_tridiagonal(ab[1:(N+1), 0], ab[1:N, 1])
         return lamb, ab[0, 1]**2 * v[0, :]**2
     else:
         return np.zeros(0), np.zeros(0)
@@ -191,21 +316,43 @@ def quadratic_modification(alphbet, z0):
     ab = np.zeros([alphbet.shape[0] - 1, 2])
     C = s_driver(z0, np.arange(alphbet.shape[0], dtype=int), alphbet)[0, :]
 
-    temp = alphbet[1:, 1] * C[1:] * C[0:-1] / np.sqrt(1 + C[0:-1]**2)
+    # 1 + C**2 enters both the a and b corrections
+    C2 = 1 + C**2
+
+    temp = alphbet[1:, 1] * C[1:] * C[0:-1] / np.sqrt(C2[0:-1])
     temp[0] = alphbet[1, 1] * C[1]
 
     acorrect = np.diff(temp)
     ab[1:, 0] = alphbet[2:, 0] + acorrect
 
-    temp = 1 + C[:]**2
-    bcorrect = temp[1:] / temp[0:-1]
-    bcorrect[0] = (1 + C[1]**2) / C[0]**2
+    bcorrect = C2[1:] / C2[0:-1]
+    bcorrect[0] = C2[1] / C[0]**2
     ab[:, 1] = alphbet[1:, 1] * np.sqrt(bcorrect)
 
     return ab
 
 
-def markov_stiltjies(u, n, ab, supp):
+def quadratic_modification_batch(alphbet, z0, scale=1.):
+    """
+    Applies quadratic_modification successively at each point in z0.
+
+    The input is a single (N+1) x 2 array
+
+    The output is a single (N+1-K) x 2 array, where K = z0.size
+
+    After each modification ab[0,1] is multiplied by scale, which keeps it in
+    floating-point range when many modifications are applied.
+    """
+
+    ab = alphbet
+    for z in np.asarray(z0).flatten():
+        ab = quadratic_modification(ab, z)
+        ab[0, 1] *= scale
+
+    return ab
+
+
+def markov_stiltjies(u, n, ab, supp, primitive=None):
 
     """ Uses the Markov-Stiltjies inequalities to provide a bounding interval for x,
     the solution to F_n(x) = u
@@ -226,6 +373,12 @@ def markov_stiltjies(u, n, ab, supp):
     param5: supp
     support on the real-line interval defined by the length-2 vector supp
 
+    param6: primitive (optional)
+    function handle evaluating F_n, as in idistinv_driver. If given, intervals
+    that do not bracket a root of F_n - u are recomputed in double precision.
+    If u is not attained inside supp to the accuracy of F_n, the interval
+    degenerates to the nearer endpoint of supp.
+
 
     Returns
     ------
@@ -241,6 +394,8 @@ def markov_stiltjies(u, n, ab, supp):
 
     x, v = gauss_quadrature_driver(ab, n)
 
+    # Normalize on a copy so the caller's coefficients are left untouched
+    ab = ab.copy()
     ab[0, 1] = 1
 
     for j in range(n):
@@ -249,50 +404,173 @@ def markov_stiltjies(u, n, ab, supp):
 
     N = ab.shape[0] - 1
 
+    if isinstance(u, float) or isinstance(u, int):
+        u = np.asarray([u])
+    else:
+        u = np.asarray(u)
+
+    def bracket(u, y, w, width):
+        # Markov-Stieltjes places the root in [X[j-1], X[j+1]]; width > 1
+        # widens this by width-1 nodes on each side.
+        X = np.concatenate(([supp[0]], np.clip(y, supp[0], supp[1]), [supp[1]]))
+        W = np.concatenate(([0.], np.cumsum(w)))
+
+        W /= W[-1]
+
+        np.minimum(W, 1., out=W)  # Just in case for machine eps issues
+        W[-1] = 1
+
+        j = np.digitize(u, W, right=False)  # bins[i-1] <= x < bins[i], left bin end is open
+        jleft = np.maximum(j - width, 0)
+        jright = np.minimum(j + width, N + 1)
+
+        flags = j == N + 1
+        jleft[flags] = N + 1
+        jright[flags] = N + 1
+
+        return np.column_stack((X[jleft], X[jright]))
+
+    # This rule only brackets the root for the solver in idistinv_driver,
+    # so it is computed in single precision. The extra node on each side
+    # keeps the root bracketed when the single-precision W puts u in a
+    # neighboring bin.
+    y, v = eigh_tridiagonal(ab[1:(N+1), 0].astype(np.float32),
+                            ab[1:N, 1].astype(np.float32))
+    intervals = bracket(u, y.astype(float), v[0, :].astype(float)**2, 2)
+
+    if primitive is None:
+        return intervals
+
+    def brackets(intervals, u):
+        fa = primitive(intervals[:, 0]) - u
+        fb = primitive(intervals[:, 1]) - u
+        return fa*fb <= 0
+
+    # The single-precision weights lose accuracy deep in the tails, where
+    # u may fall several bins off; those entries use the double-precision
+    # rule.
+    bad = np.flatnonzero(~brackets(intervals, u))
+    if bad.size == 0:
+        return intervals
+
     y, w = gauss_quadrature_driver(ab, N)
+    intervals[bad, :] = bracket(u[bad], y, w, 1)
 
-    if supp[1] > y[-1]:
-        X = np.insert(y, [0, y.size], [supp[0], supp[1]])
-        W = np.insert(np.cumsum(w), 0, 0)
+    # Near the ends of supp, u can be within the rounding error of F_n so
+    # that no sign change is resolved: fall back to the whole support, or
+    # to the endpoint of supp that u lies beyond.
+    bad = bad[~brackets(intervals[bad, :], u[bad])]
+    if bad.size > 0:
+        Fsupp = primitive(np.asarray(supp, dtype=float))
+        intervals[bad, 0], intervals[bad, 1] = supp[0], supp[1]
 
-    else:
-        X = np.insert(y, [0, y.size], [supp[0], y[-1]])
-        W = np.insert(np.cumsum(w), 0, 0)
+        flags = u[bad] >= Fsupp[1]
+        intervals[bad[flags], 0] = supp[1]
+        flags = u[bad] <= Fsupp[0]
+        intervals[bad[flags], 1] = supp[0]
 
-    W = W / W[-1]
+    return intervals
 
-    W[np.where(W > 1)] = 1  # Just in case for machine eps issues
-    W[-1] = 1
 
-    if isinstance(u, float) or isinstance(u, int):
-        u = np.asarray([u])
-    else:
-        u = np.asarray(u)
+def chandrupatla_driver(F, u, a, b, xtol=2e-12, rtol=4*np.finfo(float).eps, maxiter=100):
+    """
+    Solves F(x) = u elementwise for x in the brackets [a, b] with
+    Chandrupatla's method, a safeguarded mix of bisection and inverse
+    quadratic interpolation.
+
+    All brackets are advanced together: each iteration makes a single call
+    to F on the array of points whose brackets have not yet converged, so F
+    must accept and return 1D arrays. A ValueError is raised if F(a) - u and
+    F(b) - u have the same (nonzero) sign for any entry.
+
+    Parameters
+    ------
+    F: function handle accepting and returning 1D arrays
+    u: target values, a length-M array
+    a, b: left and right bracket endpoints, length-M arrays
+
+    Returns
+    ------
+    x: length-M array of roots, each located to within about
+    xtol + rtol*abs(x)
+    """
+
+    u = np.asarray(u, dtype=float).flatten()
+    a = np.array(a, dtype=float).flatten()
+    b = np.array(b, dtype=float).flatten()
+
+    x = np.zeros(u.size)
+    if u.size == 0:
+        return x
+
+    fa = F(a) - u
+    fb = F(b) - u
+
+    if np.any(np.sign(fa)*np.sign(fb) > 0):
+        raise ValueError("f(a) and f(b) must have different signs")
+
+    # Brackets with a root at an endpoint are already converged
+    x[fb == 0] = b[fb == 0]
+    x[fa == 0] = a[fa == 0]
+    active = (fa != 0) & (fb != 0)
 
-    j = np.digitize(u, W, right=False)  # bins[i-1] <= x < bins[i], left bin end is open
-    jleft = j - 1
-    jright = j + 1
+    c, fc = a.copy(), fa.copy()
+    t = 0.5*np.ones(u.size)
 
-    flags = j == N + 1
-    jleft[flags] = N + 1
-    jright[flags] = N + 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for _ in range(maxiter):
+            i = np.flatnonzero(active)
+            if i.size == 0:
+                break
 
-    intervals = np.array([X[jleft], X[jright]])
+            xt = a[i] + t[i]*(b[i] - a[i])
+            ft = F(xt) - u[i]
 
-    return intervals.T
+            # Keep the root bracketed by [a, b]; c is the discarded endpoint
+            same = np.sign(ft) == np.sign(fa[i])
+            c[i] = np.where(same, a[i], b[i])
+            fc[i] = np.where(same, fa[i], fb[i])
+            b[i] = np.where(same, b[i], a[i])
+            fb[i] = np.where(same, fb[i], fa[i])
+            a[i], fa[i] = xt, ft
+
+            afirst = np.abs(fa[i]) < np.abs(fb[i])
+            xm = np.where(afirst, a[i], b[i])
+            fm = np.where(afirst, fa[i], fb[i])
+
+            tol = 0.5*(xtol + rtol*np.abs(xm))
+            tlim = tol / np.abs(b[i] - c[i])
+
+            done = (tlim > 0.5) | (fm == 0)
+            x[i[done]] = xm[done]
+            active[i[done]] = False
+
+            # Inverse quadratic interpolation where it is safe, else bisect
+            xi = (a[i] - b[i]) / (c[i] - b[i])
+            phi = (fa[i] - fb[i]) / (fc[i] - fb[i])
+            iqi = (phi**2 < xi) & ((1 - phi)**2 < 1 - xi)
+
+            tiqi = fa[i] / (fb[i] - fa[i]) * fc[i] / (fb[i] - fc[i]) + \
+                (c[i] - a[i]) / (b[i] - a[i]) * fa[i] / (fc[i] - fa[i]) * fb[i] / (fc[i] - fb[i])
+            t[i] = np.clip(np.where(iqi, tiqi, 0.5), tlim, 1 - tlim)
+
+    i = np.flatnonzero(active)
+    x[i] = np.where(np.abs(fa[i]) < np.abs(fb[i]), a[i], b[i])
+
+    return x
 
 
 def idistinv_driver(u, n, primitive, ab, supp):
 
     """
-    Uses bisection to compute the (approximate) inverse of the order-n induced
+    Uses a bracketed root finder to compute the (approximate) inverse of the order-n induced
     primitive function F_n
 
     Parameters
     ------
     param3: primitive
-    The input function primitive should be a function handle accepting a single input
-    and outputs the primitive F_n evaluated at the input
+    The input function primitive should be a function handle accepting an array
+    input and outputs the primitive F_n evaluated at each entry of the input
 
     Returns
     ------
@@ -306,20 +584,21 @@ def idistinv_driver(u, n, primitive, ab, supp):
         u = np.asarray(u)
 
     if isinstance(n, np.int64):
-        intervals = markov_stiltjies(u, int(n), ab, supp)
+        intervals = markov_stiltjies(u, int(n), ab, supp, primitive)
     elif isinstance(n, int):
-        intervals = markov_stiltjies(u, n, ab, supp)
+        intervals = markov_stiltjies(u, n, ab, supp, primitive)
     else:
+        # One Markov-Stieltjes bracketing per distinct degree in n
         intervals = np.zeros((n.size, 2))
-        nmax = max(n)
-        ind = np.digitize(n, np.arange(-0.5, 0.5+nmax+1e-8), right=False)
-        for i in range(nmax+1):
-            flags = ind == i+1
-            intervals[flags, :] = markov_stiltjies(u[flags], i, ab, supp)
+        degrees, ind = np.unique(n, return_inverse=True)
+        for k, i in enumerate(degrees.tolist()):
+            flags = ind == k
+            intervals[flags, :] = markov_stiltjies(u[flags], i, ab, supp, primitive)
 
-    x = np.zeros(u.size,)
-    for j in range(u.size):
-        x[j] = optimize.bisect(lambda xx: primitive(xx) - u[j], intervals[j, 0], intervals[j, 1])
+    # Degenerate intervals pin x to an endpoint of the support
+    x = intervals[:, 0].copy()
+    i = np.flatnonzero(intervals[:, 0] < intervals[:, 1])
+    x[i] = chandrupatla_driver(primitive, u[i], intervals[i, 0], intervals[i, 1])
 
     return x
 
@@ -353,6 +632,26 @@ def linear_modification(alphbet, x0):
     return ab
 
 
+def linear_modification_batch(alphbet, x0, scale=1.):
+    """
+    Applies linear_modification successively at each point in x0.
+
+    The input is a single (N+1) x 2 array
+
+    The output is a single (N+1-K) x 2 array, where K = x0.size
+
+    After each modification ab[0,1] is multiplied by scale, as in
+    quadratic_modification_batch.
+    """
+
+    ab = alphbet
+    for x in np.asarray(x0).flatten():
+        ab = linear_modification(ab, x)
+        ab[0, 1] *= scale
+
+    return ab
+
+
 def derivative_expansion_driver(ab, s, N, K):
     """
     Computes the coefficients 
@@ -388,6 +687,12 @@ def derivative_expansion_driver(ab, s, N, K):
     if N < s:
         return np.zeros([N+1, K+1])
 
+    a = ab[:, 0]
+    b = ab[:, 1]
+
+    # logb[q-1] = sum(log(b[1:(q+1)])), for the starting values below
+    logb = np.cumsum(np.log(b[1:(s+1)]))
+
     # s=0 coefficients
     Cp = np.eye(NK+1)
     C = np.zeros([NK+1, NK+1])
@@ -396,22 +701,19 @@ def derivative_expansion_driver(ab, s, N, K):
     for q in range(1, s+1):
 
         # Explicit starting value
-        C[q,0] = np.exp(gammaln(q+1) - np.sum(np.log(ab[1:(q+1), 1])))
+        C[q,0] = np.exp(gammaln(q+1) - logb[q-1])
 
+        # Row n only depends on rows n-1 and n-2, so all of its nonzero
+        # entries k = 0, ..., n-q are formed at once. The C[n-1, k-1] term
+        # is absent for k=0.
         for n in range(q+1, N+1):
-            # k=0 is special
-            C[n, 0] = q*Cp[n-1, 0] + (ab[1, 0] - ab[n, 0])*C[n-1, 0] - \
-                     ab[n-1, 1]*C[n-2, 0] + ab[1, 1]*C[n-1, 1]
-            C[n, 0] /= ab[n, 1]
-
-            for k in range(1, n-q+1):
-                C[n, k] = q*Cp[n-1, k] + (ab[k+1, 0] - ab[n, 0])*C[n-1, k] - \
-                          ab[n-1, 1]*C[n-2, k] + ab[k+1, 1]*C[n-1, k+1] + \
-                          ab[k, 1]*C[n-1, k-1]
-                C[n, k] /= ab[n, 1]
+            m = n-q+1
+            row = q*Cp[n-1, :m] + (a[1:(m+1)] - a[n])*C[n-1, :m] - \
+                b[n-1]*C[n-2, :m] + b[1:(m+1)]*C[n-1, 1:(m+1)]
+            row[1:] += b[1:m]*C[n-1, :(m-1)]
+            C[n, :m] = row / b[n]
 
-        Cp = C.copy()
-        C = np.zeros([NK+1, NK+1])
+        Cp, C = C, np.zeros([NK+1, NK+1])
 
     return Cp[:(N+1),:(K+1)]
 
@@ -419,7 +721,12 @@ class OrthogonalPolynomialBasis1D:
     def __init__(self, recurrence=[], probability_measure=True):
         self.probability_measure = probability_measure
         self.ab = np.zeros([0, 2])
-        pass
+        # Views self.ab[:(N+1), :] handed out by recurrence, keyed by N
+        self._ab_views = {}
+        # Contiguous copies of the columns of self.ab, and 1/b
+        self._a = np.zeros(0)
+        self._b = np.zeros(0)
+        self._inv_b = np.zeros(0)
 
     def recurrence(self, N):
         """
@@ -441,6 +748,13 @@ class OrthogonalPolynomialBasis1D:
         not contain enough coefficients, then a call to
         recurrence_driver is performed to compute the desired
         coefficients, and the output is stored in the instance variable.
+        The returned views are memoized by N, so repeated calls with the
+        same N reduce to a dictionary lookup.
+
+        Contiguous copies of the a and b columns, and the reciprocals 1/b,
+        are kept alongside in self._a, self._b and self._inv_b for the
+        loops in this class; they cover at least the first N+1 entries
+        after this call.
 
         Parameters
         ----------
@@ -453,11 +767,21 @@ class OrthogonalPolynomialBasis1D:
             (N+1) x 2 array of recurrence coefficients.
         """
 
+        ab = self._ab_views.get(N)
+        if ab is not None:
+            return ab
+
         if N+1 > self.ab.shape[0]:
             self.ab = self.recurrence_driver(N)
-            return self.ab
-        else:
-            return self.ab[:(N+1), :]
+            self._ab_views = {}
+            self._a = np.ascontiguousarray(self.ab[:, 0])
+            self._b = np.ascontiguousarray(self.ab[:, 1])
+            with np.errstate(divide='ignore'):
+                self._inv_b = 1/self._b
+
+        ab = self.ab[:(N+1), :]
+        self._ab_views[N] = ab
+        return ab
 
     # Recurrence coefficient functions should be defined as follows:
     # The returned array has size (N+1) x 2. The [0,0] entry is not used
@@ -469,6 +793,16 @@ class OrthogonalPolynomialBasis1D:
         raise ValueError('Define this')
         return
 
+    def _standardize(self, x):
+        """
+        Maps input locations x to the domain on which the recurrence
+        coefficients are defined. This is the identity map; families whose
+        eval first transforms x override it, so that routines evaluating
+        the recurrence directly (clenshaw, christoffel_function) apply the
+        same transform.
+        """
+        return x
+
     def eval(self, x, n, d=0):
         # Evaluates univariate orthonormal polynomials given their
         # three-term recurrence coefficients ab.
@@ -495,6 +829,43 @@ class OrthogonalPolynomialBasis1D:
 
         return eval_driver(x, n, d, ab)
 
+    def clenshaw(self, x, c):
+        """
+        Evaluates the expansion
+
+          sum_{k=0}^N c[k] p_k(x),    N = c.shape[0] - 1,
+
+        with the (backward) Clenshaw recurrence. Only two rolling vectors are
+        kept, so the x.size x (N+1) table formed by eval is never allocated.
+
+        If c is a 2D array, each column is a separate expansion and the
+        output has shape x.size x c.shape[1]; otherwise it has size x.size.
+        """
+
+        c = np.asarray(c, dtype=float)
+        x = self._standardize(np.asarray(x, dtype=float).flatten())
+
+        N = c.shape[0] - 1
+        assert N > -1
+        self.recurrence(N)
+        a = self._a[:(N+1)].tolist()
+        b = self._b[:(N+1)].tolist()
+        inv_b = self._inv_b[:(N+1)].tolist()
+
+        if c.ndim > 1:
+            x = x[:, np.newaxis]
+
+        # y1, y2 hold y_{k+1}, y_{k+2}, with y_N = c[N] and y_{N+1} = 0
+        y1 = np.zeros(x.shape[:1] + c.shape[1:]) + c[N]
+        y2 = np.zeros(y1.shape)
+        for k in range(N-1, -1, -1):
+            y0 = c[k] + inv_b[k+1] * (x - a[k+1]) * y1
+            if k < N-1:
+                y0 -= b[k+1]*inv_b[k+2] * y2
+            y1, y2 = y0, y1
+
+        return y1/b[0]
+
     def jacobi_matrix_driver(ab, N):
         """
         Returns the N x N jacobi matrix associated to the input recurrence
@@ -528,20 +899,7 @@ class OrthogonalPolynomialBasis1D:
             J*v, where J is the Jacobi matrix of size v.shape[0].
         """
 
-        N = v.shape[0]
-        ab = self.recurrence(N+1)
-
-        # Rebroadcast v so we can take advantage of numpy's
-        # multiplication
-        v = np.moveaxis(v, 0, -1)
-
-        # J = np.diag(ab[1:N,1], k=1) + np.diag(ab[1:(N+1),0],k=0) + np.diag(ab[1:N,1], k=-1)
-        Jv = v*ab[1:(N+1), 0]
-        Jv[..., :-1] += v[..., 1:]*ab[1:N, 1]
-        Jv[..., 1:] += v[..., :-1]*ab[1:N, 1]
-        Jv = np.moveaxis(Jv, -1, 0)
-
-        return Jv
+        return apply_jacobi_matrix_driver(self.recurrence(v.shape[0]+1), v)
 
     def gauss_quadrature(self, N):
         """
@@ -568,8 +926,7 @@ class OrthogonalPolynomialBasis1D:
         cd = ab.copy()
         cd[N, 0] += c*cd[N, 1]
 
-        J = np.diag(cd[1:N, 1], k=1) + np.diag(cd[1:(N+1), 0], k=0) + np.diag(cd[1:N, 1], k=-1)
-        lamb, v = eigh(J)
+        lamb, v = eigh_tridiagonal(cd[1:(N+1), 0], cd[1:N, 1])
 
         return lamb, v[0, :]**2
 
@@ -603,15 +960,21 @@ class OrthogonalPolynomialBasis1D:
         C[1, 1] = C[0, 0]/ab[1, 1]
         C[1, 0] = -ab[1, 0]*C[0, 0]/ab[1, 1]
 
+        # Scalar coefficients are pulled out as Python floats, and the
+        # division by b_{n+1} becomes a multiplication by its reciprocal.
+        a = self._a[:N].tolist()
+        b = self._b[:N].tolist()
+        inv_b = self._inv_b[:N].tolist()
+
         for n in range(1, N-1):
-            C[n+1, 0] = -ab[n+1, 0]*C[n, 0] - ab[n, 1]*C[n-1, 0]
-            C[n+1, n] = C[n, n-1] - ab[n+1, 0]*C[n, n]
+            an, bn = a[n+1], b[n]
+            C[n+1, 0] = -an*C[n, 0] - bn*C[n-1, 0]
+            C[n+1, n] = C[n, n-1] - an*C[n, n]
             C[n+1, n+1] = C[n, n]
 
-            js = np.arange(1, n)
-            C[n+1, js] = C[n, js-1] - ab[n+1, 0]*C[n, js] - ab[n, 1]*C[n-1, js]
+            C[n+1, 1:n] = C[n, :(n-1)] - an*C[n, 1:n] - bn*C[n-1, 1:n]
 
-            C[n+1, :] /= ab[n+1, 1]
+            C[n+1, :(n+2)] *= inv_b[n+1]
 
         return C
 
@@ -638,12 +1001,14 @@ class OrthogonalPolynomialBasis1D:
         C[1, 1] = ab[0, 1]*ab[1, 1]
         C[1, 0] = ab[1, 0]*ab[0, 1]
 
+        # x^n only involves p_0, ..., p_n, so row n is zero past column n
+        # and J only needs to act on its leading (n+2)-entry block.
         for n in range(1, N-1):
-            C[n+1, :] = self.apply_jacobi_matrix(C[n, :])
+            apply_jacobi_matrix_driver(ab, C[n, :(n+2)], out=C[n+1, :(n+2)])
 
         return C
 
-    def tuple_product_generator(self, IC, ab=None):
+    def tuple_product_generator(self, IC, ab=None, nrows=None):
         """
         Helper function that increments indices for a polynomial product expansion.
 
@@ -671,6 +1036,11 @@ class OrthogonalPolynomialBasis1D:
         ab: ndarray, optional
             Recurrence coefficients
 
+        nrows: integer, optional
+            If given, only the first nrows rows of C are computed, and C
+            is nrows x N. Row n depends only on rows n-1 and n-2, so these
+            are the same as the leading rows of the full matrix.
+
         Returns
         -------
         C: ndarray
@@ -678,12 +1048,17 @@ class OrthogonalPolynomialBasis1D:
         """
 
         N = IC.size
+        if nrows is None:
+            nrows = N
         ab = self.recurrence(N+1)
-        C = np.zeros((N, N))
+        C = np.zeros((nrows, N))
         C[0, :] = IC
 
-        for n in range(N-1):
-            C[n+1, :] = self.apply_jacobi_matrix(C[n, :]) - ab[n+1, 0]*C[n, :]
+        # Each row is formed in place in C; ab already covers the N x N
+        # Jacobi matrix, so it is not refetched per row.
+        for n in range(nrows-1):
+            apply_jacobi_matrix_driver(ab, C[n, :], out=C[n+1, :])
+            C[n+1, :] -= ab[n+1, 0]*C[n, :]
             if n > 0:
                 C[n+1, :] -= ab[n, 1]*C[n-1, :]
             C[n+1, :] /= ab[n+1, 1]
@@ -732,9 +1107,13 @@ class OrthogonalPolynomialBasis1D:
         #                          = C[alpha[0],:]
         C[alpha[0], alpha[0]] = 1.
 
+        # Each pass only reads row alpha[j] of the previous one, and the
+        # result only needs the first N rows, so no generator call forms
+        # more rows than are used.
         for j in range(M):
             IC = C[alpha[j], :]/ab[0, 1]
-            C = self.tuple_product_generator(IC, ab=ab)
+            nrows = alpha[j+1]+1 if j < M-1 else N
+            C = self.tuple_product_generator(IC, ab=ab, nrows=nrows)
 
         return C[:N, :N]
 
@@ -860,13 +1239,17 @@ class OrthogonalPolynomialBasis1D:
         q[:, 0] = 1.
         qt = np.zeros(x.size)
 
+        # The normalization sqrt(1 + qt**2) of each step is reused in the
+        # next one.
         if n > 1:
             qt = 1/ab[1, 1] * (x - ab[1, 0]) * q[:, 0]
-            q[:, 1] = qt / np.sqrt(1 + qt**2)
+            qden = np.sqrt(1 + qt**2)
+            q[:, 1] = qt / qden
 
         for j in range(1, n-1):
-            qt = 1/ab[j+1, 1] * ((x - ab[j+1, 0])*q[:, j] - ab[j, 1] * q[:, j-1] / np.sqrt(1 + qt**2))
-            q[:, j+1] = qt / np.sqrt(1 + qt**2)
+            qt = 1/ab[j+1, 1] * ((x - ab[j+1, 0])*q[:, j] - ab[j, 1] * q[:, j-1] / qden)
+            qden = np.sqrt(1 + qt**2)
+            q[:, j+1] = qt / qden
 
         if type(d) == int:
             if d == 0:
@@ -900,8 +1283,27 @@ class OrthogonalPolynomialBasis1D:
 
         assert k > 0
 
-        p = self.eval(x, range(k))
-        return np.sqrt(float(k) / np.sum(p**2, axis=1))
+        x = self._standardize(np.asarray(x, dtype=float).flatten())
+        self.recurrence(k-1)
+        a = self._a[:k].tolist()
+        b = self._b[:k].tolist()
+        binv = self._inv_b[:k].tolist()
+
+        # Only p_{j-1} and p_j are kept, and their squares are accumulated
+        # as the recurrence runs, so the x.size x k table from eval is never
+        # formed.
+        pprev = np.zeros(x.size)
+        p = np.full(x.size, binv[0])
+        psum = p**2
+        for j in range(1, k):
+            pnext = (x - a[j])*p
+            if j > 1:
+                pnext -= b[j-1]*pprev
+            pnext *= binv[j]
+            psum += pnext**2
+            pprev, p = p, pnext
+
+        return np.sqrt(float(k) / psum)
 
     def derivative_expansion(self, s, N, K=None):
         """
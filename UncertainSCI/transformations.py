@@ -25,21 +25,18 @@ class AffineTransform:
                        "Domain, image matrices must be of same shape"
 
             self.diagonal = True
-            d = domain.shape[1]
-            self.A = sprs.eye(d)
 
-            a = np.zeros(d)
-            b = np.zeros(d)
-            for q in range(d):
-                a[q] = (image[1, q] - image[0, q]) / \
-                       (domain[1, q] - domain[0, q])
-                b[q] = image[0, q] - domain[0, q]*a[q]
+            a = (image[1, :] - image[0, :]) / (domain[1, :] - domain[0, :])
+            ainv = 1/a
 
             self.A = sprs.diags(a, 0)
-            self.b = b
+            self.b = image[0, :] - domain[0, :]*a
 
-            self.Ainv = sprs.diags(1/a, 0)
-            self.binv = self.Ainv.dot(-self.b)
+            self.Ainv = sprs.diags(ainv, 0)
+            self.binv = -ainv*self.b
+
+            # Scalar maps are applied without densifying the sparse matrices
+            self._A11, self._Ainv11 = a[0], ainv[0]
 
         elif (A is not None) and (b is not None):
             # Assume A is a numpy array
@@ -52,6 +49,8 @@ class AffineTransform:
             self.A, self.b = A, b
             self.Ainv = np.linalg.inv(A)
             self.binv = self.Ainv.dot(-self.b)
+
+            self._A11, self._Ainv11 = self.A[0, 0], self.Ainv[0, 0]
         else:
             raise ValueError('Domain/image or A/b must be specified')
 
@@ -61,10 +60,7 @@ class AffineTransform:
             if len(x) == self.b.size:
                 return self.A.dot(x) + self.b
             elif self.b.size == 1:
-                if isinstance(self.A, sprs.spmatrix):
-                    return self.A.todense()[0, 0]*x + self.b
-                else:
-                    return self.A[0, 0]*x + self.b
+                return self._A11*x + self.b
 
         else:
             return self.A.dot(x.T).T + self.b
@@ -75,10 +71,7 @@ class AffineTransform:
             if len(x) == self.binv.size:
                 return self.Ainv.dot(x) + self.binv
             elif self.b.size == 1:
-                if isinstance(self.A, sprs.spmatrix):
-                    return self.Ainv.todense()[0, 0]*x + self.binv
-                else:
-                    return self.Ainv[0, 0]*x + self.binv
+                return self._Ainv11*x + self.binv
 
         else:
             return self.Ainv.dot(x.T).T + self.binv
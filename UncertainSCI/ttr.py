@@ -1,19 +1,76 @@
 import numpy as np
 import scipy.special as sp
+from scipy.linalg import cho_factor, cho_solve
 
-from UncertainSCI.opoly1d import eval_driver, \
+from UncertainSCI.opoly1d import eval_driver, eval_pair_driver, \
         leading_coefficient_driver, gauss_quadrature_driver
 
 # from UncertainSCI.utils.compute_subintervals import compute_subintervals
 from UncertainSCI.utils.quad import gq_modification_composite, \
         gq_modification_unbounded_composite, compute_subintervals
+from UncertainSCI.utils.array_unique import merge_sorted_unique
+
+
+def _singularity_array(singularity_list):
+    """
+    Returns the singularity list as an S x 3 array with rows
+    [location, left strength, right strength].
+    """
+    return np.array(singularity_list, dtype=float).reshape([-1, 3])
+
+
+def _append_breaks(singularities, roots):
+    """
+    Appends the entries of roots to the S x 3 singularity array as
+    breakpoints with zero singularity strength. The result is written into
+    a single (S + roots.size) x 3 allocation.
+    """
+    S = singularities.shape[0]
+    breaks = np.empty([S + roots.size, 3])
+    breaks[:S, :] = singularities
+    breaks[S:, 0] = roots
+    breaks[S:, 1:] = 0.
+    return breaks
+
+
+def _snap_to_breaks(roots, breaks):
+    """
+    Replaces each entry of roots by the nearest entry of the sorted array
+    breaks. Roots that were merged into a single breakpoint must sit exactly
+    on it: a linear modification root left a rounding error inside a
+    subinterval makes the modified measure indefinite there.
+    """
+    if breaks.size == 1:
+        return np.full(roots.shape, breaks[0])
+
+    ind = np.clip(np.searchsorted(breaks, roots), 1, breaks.size-1)
+    left, right = breaks[ind-1], breaks[ind]
+    return np.where(roots - left <= right - roots, left, right)
+
+
+def _resume_recurrence(ab_init, N):
+    """
+    Allocates the N x 2 output of a TTR routine and copies in the leading
+    rows of ab_init (if given), so that a request for more coefficients can
+    resume from the result of a previous call instead of starting over.
+    Returns the array and the number of rows copied.
+    """
+    ab = np.zeros([N, 2])
+    if ab_init is None:
+        return ab, 0
+
+    M = min(ab_init.shape[0], N)
+    ab[:M, :] = ab_init[:M, :]
+    return ab, M
+
 
 """
 Predictor-corrector method
 """
 
 
-def predict_correct_bounded(a, b, weight, N, singularity_list, Nquad=10):
+def predict_correct_bounded(a, b, weight, N, singularity_list, Nquad=10,
+                            ab_init=None):
     """ Three-term recurrence coefficients from quadrature
 
     Computes the first N three-term recurrence coefficient pairs associated to
@@ -21,6 +78,10 @@ def predict_correct_bounded(a, b, weight, N, singularity_list, Nquad=10):
 
     Performs global integration on [a, b] using
     utils.quad.gq_modification_composite.
+
+    If ab_init is given, its leading rows are taken as already computed
+    coefficients and the procedure resumes from there. (The same applies to
+    the other predictor-corrector and Stieltjes routines below.)
     """
 
     assert a < b
@@ -28,23 +89,26 @@ def predict_correct_bounded(a, b, weight, N, singularity_list, Nquad=10):
     # First divide [a, b] into subintervals based on singularity locations.
     subintervals = compute_subintervals(a, b, singularity_list)
 
-    ab = np.zeros([N, 2])
-    ab[0, 1] = np.sqrt(gq_modification_composite(weight, a, b, Nquad,
-                       subintervals=subintervals))
+    ab, M = _resume_recurrence(ab_init, N)
+    if M == 0:
+        ab[0, 1] = np.sqrt(gq_modification_composite(weight, a, b, Nquad,
+                           subintervals=subintervals))
+        M = 1
 
-    peval = lambda x, n: eval_driver(x, np.array([n]), 0, ab)
+    # p_n * p_{n+1} and p_{n+1} from a single two-vector recurrence sweep
+    peval_prod = lambda x, n: np.prod(eval_pair_driver(x, n, ab), axis=0)
+    peval_next = lambda x, n: eval_pair_driver(x, n, ab)[1]
 
-    for n in range(0, N-1):
+    for n in range(M-1, N-1):
         # Guess next coefficients
         ab[n+1, 0], ab[n+1, 1] = ab[n, 0], ab[n, 1]
 
-        integrand = lambda x: weight(x) * peval(x, n).flatten() *\
-                      peval(x, n+1).flatten()
+        integrand = lambda x: weight(x) * peval_prod(x, n)
         ab[n+1, 0] += ab[n, 1] * gq_modification_composite(integrand, a, b,
                                                            n+1+Nquad,
                                                            subintervals)
 
-        integrand = lambda x: weight(x) * peval(x, n+1).flatten()**2
+        integrand = lambda x: weight(x) * peval_next(x, n)**2
         ab[n+1, 1] *= np.sqrt(gq_modification_composite(integrand, a, b,
                                                         n+1+Nquad,
                                                         subintervals))
@@ -52,55 +116,62 @@ def predict_correct_bounded(a, b, weight, N, singularity_list, Nquad=10):
     return ab
 
 
-def predict_correct_unbounded(a, b, weight, N, singularity_list, Nquad=10):
+def predict_correct_unbounded(a, b, weight, N, singularity_list, Nquad=10,
+                              ab_init=None):
     assert a < b
-    ab = np.zeros([N, 2])
-    ab[0, 1] = np.sqrt(gq_modification_unbounded_composite(weight, a, b, Nquad,
-                                                           singularity_list))
+    ab, M = _resume_recurrence(ab_init, N)
+    if M == 0:
+        ab[0, 1] = np.sqrt(gq_modification_unbounded_composite(weight, a, b, Nquad,
+                                                               singularity_list))
+        M = 1
 
-    peval = lambda x, n: eval_driver(x, np.array([n]), 0, ab)
+    # p_n * p_{n+1} and p_{n+1} from a single two-vector recurrence sweep
+    peval_prod = lambda x, n: np.prod(eval_pair_driver(x, n, ab), axis=0)
+    peval_next = lambda x, n: eval_pair_driver(x, n, ab)[1]
 
-    for n in range(0, N-1):
+    for n in range(M-1, N-1):
         # Guess next coefficients
         ab[n+1, 0], ab[n+1, 1] = ab[n, 0], ab[n, 1]
 
-        integrand = lambda x: weight(x) * peval(x, n).flatten() *\
-                              peval(x, n+1).flatten()
+        integrand = lambda x: weight(x) * peval_prod(x, n)
         ab[n+1, 0] += ab[n, 1] * gq_modification_unbounded_composite(integrand,
                                     a, b, n+1+Nquad, singularity_list)
 
-        integrand = lambda x: weight(x) * peval(x, n+1).flatten()**2
+        integrand = lambda x: weight(x) * peval_next(x, n)**2
         ab[n+1, 1] *= np.sqrt(gq_modification_unbounded_composite(integrand, a,
                                 b, n+1+Nquad, singularity_list))
 
     return ab
 
 
-def predict_correct_discrete(xg, wg, N):
+def predict_correct_discrete(xg, wg, N, ab_init=None):
 
     assert all(i >= 0 for i in wg)
     assert N <= len(xg)
 
-    ab = np.zeros([N, 2])
-    ab[0, 1] = np.sqrt(np.sum(wg))
+    ab, M = _resume_recurrence(ab_init, N)
+    if M == 0:
+        ab[0, 1] = np.sqrt(np.sum(wg))
+        M = 1
 
-    peval = lambda x, n: eval_driver(x, np.array([n]), 0, ab)
+    peval_prod = lambda x, n: np.prod(eval_pair_driver(x, n, ab), axis=0)
+    peval_next = lambda x, n: eval_pair_driver(x, n, ab)[1]
 
-    for n in range(0, N-1):
+    for n in range(M-1, N-1):
         # Guess next coefficients
         ab[n+1, 0], ab[n+1, 1] = ab[n, 0], ab[n, 1]
 
-        integrand = lambda x: peval(x, n).flatten() * peval(x, n+1).flatten()
+        integrand = lambda x: peval_prod(x, n)
         ab[n+1, 0] += ab[n, 1] * np.sum(integrand(xg) * wg)
 
-        integrand = lambda x: peval(x, n+1).flatten()**2
+        integrand = lambda x: peval_next(x, n)**2
         ab[n+1, 1] *= np.sqrt(np.sum(integrand(xg) * wg))
 
     return ab
 
 
 def predict_correct_bounded_composite(a, b, weight, N, singularity_list,
-                                      Nquad=10):
+                                      Nquad=10, ab_init=None):
     """ Three-term recurrence coefficients from composite quadrature
 
     Computes the first N three-term recurrence coefficient pairs associated to
@@ -112,30 +183,38 @@ def predict_correct_bounded_composite(a, b, weight, N, singularity_list,
 
     assert a < b
 
+    singularities = _singularity_array(singularity_list)
+
     # First divide [a, b] into subintervals based on singularity locations.
-    global_subintervals = compute_subintervals(a, b, singularity_list)
+    global_subintervals = compute_subintervals(a, b, singularities)
 
-    ab = np.zeros([N, 2])
-    ab[0, 1] = np.sqrt(gq_modification_composite(weight, a, b, Nquad, 
-                        subintervals=global_subintervals))
+    ab, M = _resume_recurrence(ab_init, N)
+    if M == 0:
+        ab[0, 1] = np.sqrt(gq_modification_composite(weight, a, b, Nquad, 
+                            subintervals=global_subintervals))
+        M = 1
 
     integrand = weight
 
-    for n in range(0, N-1):
+    # The zeros of p_n only depend on ab[:n+1, :], which is final once step
+    # n-1 has corrected ab[n, 0]; carry them over from the previous step.
+    pn_zeros = gauss_quadrature_driver(ab, M-1)[0]
+
+    for n in range(M-1, N-1):
         # Guess next coefficients
         ab[n+1, 0], ab[n+1, 1] = ab[n, 0], ab[n, 1]
 
         # Set up linear modification roots and subintervals
-        breaks = singularity_list.copy()
-        pn_zeros = gauss_quadrature_driver(ab, n)[0]
         pn1_zeros = gauss_quadrature_driver(ab, n+1)[0]
 
         roots = np.hstack([pn_zeros, pn1_zeros])
-        breaks += [[z, 0, 0] for z in roots]
+        breaks = _append_breaks(singularities, roots)
         subintervals = compute_subintervals(a, b, breaks)
 
-        # Leading coefficient
-        qlc = np.prod(leading_coefficient_driver(n+2, ab)[-2:])
+        # Leading coefficients; ab[n+1, 1] is not corrected until the end of
+        # this step, so one evaluation serves both modifications.
+        lc = leading_coefficient_driver(n+2, ab)
+        qlc = lc[-2] * lc[-1]
 
         ab[n+1, 0] += ab[n, 1] * gq_modification_composite(integrand, a, b,
                                                            n+1+Nquad,
@@ -145,38 +224,46 @@ def predict_correct_bounded_composite(a, b, weight, N, singularity_list,
 
         # Here subintervals are the global ones
         pn1_zeros = gauss_quadrature_driver(ab, n+1)[0]
-        qlc = (leading_coefficient_driver(n+2, ab)[-1])**2
+        qlc = lc[-1]**2
 
         ab[n+1, 1] *= np.sqrt(gq_modification_composite(integrand, a, b,
                                 n+1+Nquad, global_subintervals,
                                 quadroots=pn1_zeros, leading_coefficient=qlc))
 
+        pn_zeros = pn1_zeros
+
     return ab
 
 def predict_correct_unbounded_composite(a, b, weight, N, singularity_list,
-                                        Nquad=10):
+                                        Nquad=10, ab_init=None):
     assert a < b
 
-    ab = np.zeros([N, 2])
-    ab[0, 1] = np.sqrt(gq_modification_unbounded_composite(weight, a, b, Nquad,
-                                                           singularity_list))
+    singularities = _singularity_array(singularity_list)
+
+    ab, M = _resume_recurrence(ab_init, N)
+    if M == 0:
+        ab[0, 1] = np.sqrt(gq_modification_unbounded_composite(weight, a, b, Nquad,
+                                                               singularities))
+        M = 1
 
     integrand = weight
 
-    for n in range(0, N-1):
+    # See predict_correct_bounded_composite: zeros of p_n are carried over.
+    pn_zeros = gauss_quadrature_driver(ab, M-1)[0]
+
+    for n in range(M-1, N-1):
         # Guess next coefficients
         ab[n+1, 0], ab[n+1, 1] = ab[n, 0], ab[n, 1]
 
         # Set up linear modification roots and subintervals
-        breaks = singularity_list.copy()
-        pn_zeros = gauss_quadrature_driver(ab, n)[0]
         pn1_zeros = gauss_quadrature_driver(ab, n+1)[0]
 
         roots = np.hstack([pn_zeros, pn1_zeros])
-        breaks += [[z, 0, 0] for z in roots]
+        breaks = _append_breaks(singularities, roots)
 
-        # Leading coefficient
-        qlc = np.prod(leading_coefficient_driver(n+2, ab)[-2:])
+        # Leading coefficients, shared by both modifications
+        lc = leading_coefficient_driver(n+2, ab)
+        qlc = lc[-2] * lc[-1]
 
         ab[n+1, 0] += ab[n, 1] * gq_modification_unbounded_composite(integrand,
                                     a, b, n+1+Nquad, breaks, roots=roots,
@@ -184,32 +271,37 @@ def predict_correct_unbounded_composite(a, b, weight, N, singularity_list,
 
         # Here subintervals are the global ones
         pn1_zeros = gauss_quadrature_driver(ab, n+1)[0]
-        qlc = (leading_coefficient_driver(n+2, ab)[-1])**2
+        qlc = lc[-1]**2
 
         ab[n+1, 1] *= np.sqrt(gq_modification_unbounded_composite(integrand, a,
-                                b, n+1+Nquad, singularity_list,
+                                b, n+1+Nquad, singularities,
                                 quadroots=pn1_zeros, leading_coefficient=qlc))
 
+        pn_zeros = pn1_zeros
+
     return ab
 
 
 """
 Stieltjes procedure
 """
-def stieltjes_bounded(a, b, weight, N, singularity_list, Nquad=10):
+def stieltjes_bounded(a, b, weight, N, singularity_list, Nquad=10,
+                      ab_init=None):
 
 
     assert a < b
 
     subintervals = compute_subintervals(a, b, singularity_list)
 
-    ab = np.zeros([N, 2])
-    ab[0, 1] = np.sqrt(gq_modification_composite(weight, a, b, Nquad,
-                                                 subintervals=subintervals))
+    ab, M = _resume_recurrence(ab_init, N)
+    if M == 0:
+        ab[0, 1] = np.sqrt(gq_modification_composite(weight, a, b, Nquad,
+                                                     subintervals=subintervals))
+        M = 1
 
     peval = lambda x, n: eval_driver(x, np.array([n]), 0, ab)
 
-    for n in range(1, N):
+    for n in range(M, N):
         integrand = lambda x: weight(x) * x * peval(x, n-1).flatten()**2
         ab[n, 0] = gq_modification_composite(integrand, a, b, n+1+Nquad,
                                              subintervals)
@@ -225,17 +317,20 @@ def stieltjes_bounded(a, b, weight, N, singularity_list, Nquad=10):
 
     return ab
 
-def stieltjes_unbounded(a, b, weight, N, singularity_list, Nquad=10):
+def stieltjes_unbounded(a, b, weight, N, singularity_list, Nquad=10,
+                        ab_init=None):
 
     assert a < b
 
-    ab = np.zeros([N, 2])
-    ab[0, 1] = np.sqrt(gq_modification_unbounded_composite(weight, a, b, Nquad,
-                                                           singularity_list))
+    ab, M = _resume_recurrence(ab_init, N)
+    if M == 0:
+        ab[0, 1] = np.sqrt(gq_modification_unbounded_composite(weight, a, b, Nquad,
+                                                               singularity_list))
+        M = 1
 
     peval = lambda x, n: eval_driver(x, np.array([n]), 0, ab)
 
-    for n in range(1, N):
+    for n in range(M, N):
         integrand = lambda x: weight(x) * x * peval(x, n-1).flatten()**2
         ab[n, 0] = gq_modification_unbounded_composite(integrand, a, b,
                                                        n+1+Nquad,
@@ -252,17 +347,19 @@ def stieltjes_unbounded(a, b, weight, N, singularity_list, Nquad=10):
 
     return ab
 
-def stieltjes_discrete(xg, wg, N):
+def stieltjes_discrete(xg, wg, N, ab_init=None):
 
     assert all(i >=0 for i in wg)
     assert N <= len(xg)
 
-    ab = np.zeros([N, 2])
-    ab[0, 1] = np.sqrt(np.sum(wg))
+    ab, M = _resume_recurrence(ab_init, N)
+    if M == 0:
+        ab[0, 1] = np.sqrt(np.sum(wg))
+        M = 1
 
     peval = lambda x, n: eval_driver(x, np.array([n]), 0, ab)
 
-    for n in range(1, N):
+    for n in range(M, N):
         integrand = lambda x: x * peval(x, n-1).flatten()**2
         ab[n, 0] = np.sum(integrand(xg) * wg)
         if n == 1:
@@ -275,31 +372,36 @@ def stieltjes_discrete(xg, wg, N):
 
     return ab
 
-def stieltjes_bounded_composite(a, b, weight, N, singularity_list, Nquad=10):
+def stieltjes_bounded_composite(a, b, weight, N, singularity_list, Nquad=10,
+                                ab_init=None):
 
     assert a < b
 
+    singularities = _singularity_array(singularity_list)
+
     # First divide [a, b] into subintervals based on singularity locations.
-    global_subintervals = compute_subintervals(a, b, singularity_list)
+    global_subintervals = compute_subintervals(a, b, singularities)
 
-    ab = np.zeros([N, 2])
-    ab[0, 1] = np.sqrt(gq_modification_composite(weight, a, b, Nquad, 
-                                             subintervals=global_subintervals))
+    ab, M = _resume_recurrence(ab_init, N)
+    if M == 0:
+        ab[0, 1] = np.sqrt(gq_modification_composite(weight, a, b, Nquad, 
+                                                 subintervals=global_subintervals))
+        M = 1
 
     integrand = weight
 
-    for n in range(1, N):
+    for n in range(M, N):
 
-        breaks = singularity_list.copy()
         pnminus1_zeros = gauss_quadrature_driver(ab, n-1)[0]
-        roots = np.hstack([0, pnminus1_zeros])
-        breaks += [[z, 0, 0] for z in roots]
+        roots = merge_sorted_unique([0., pnminus1_zeros], tol=1e-12)
+        breaks = _append_breaks(singularities, roots)
         subintervals = compute_subintervals(a, b, breaks)
 
         qlc = np.prod(leading_coefficient_driver(n, ab)[-1])**2
 
         ab[n, 0] = gq_modification_composite(integrand, a, b, n+1+Nquad,
-                                             subintervals, roots=np.zeros(1,),
+                                             subintervals,
+                                             roots=_snap_to_breaks(np.zeros(1,), roots),
                                              quadroots=pnminus1_zeros,
                                              leading_coefficient=qlc)
 
@@ -324,9 +426,12 @@ def stieltjes_bounded_composite(a, b, weight, N, singularity_list, Nquad=10):
                                             leading_coefficient=qlc)
 
             # below pnminus1_zeros already includes ab[n, 0]
-            roots = np.hstack([pnminus1_zeros, pnminus2_zeros]) 
-            breaks_new = singularity_list.copy()
-            breaks_new += [[z, 0, 0] for z in roots]
+            breaks_new = merge_sorted_unique([pnminus1_zeros[:1],
+                                              pnminus1_zeros[1:],
+                                              pnminus2_zeros], tol=1e-12)
+            roots = _snap_to_breaks(np.hstack([pnminus1_zeros, pnminus2_zeros]),
+                                    breaks_new)
+            breaks_new = _append_breaks(singularities, breaks_new)
             subintervals = compute_subintervals(a, b, breaks_new)
             qlc = np.prod(leading_coefficient_driver(n, ab)[-2:])
             s_3 = gq_modification_composite(integrand, a, b, n+1+Nquad,
@@ -339,46 +444,48 @@ def stieltjes_bounded_composite(a, b, weight, N, singularity_list, Nquad=10):
 
     return ab
 
-def stieltjes_unbounded_composite(a, b, weight, N, singularity_list, Nquad=10):
+def stieltjes_unbounded_composite(a, b, weight, N, singularity_list, Nquad=10,
+                                  ab_init=None):
 
     assert a < b
 
-    ab = np.zeros([N, 2])
-    ab[0, 1] = np.sqrt(gq_modification_unbounded_composite(weight, a, b, Nquad,
-                                                           singularity_list))
+    singularities = _singularity_array(singularity_list)
+
+    ab, M = _resume_recurrence(ab_init, N)
+    if M == 0:
+        ab[0, 1] = np.sqrt(gq_modification_unbounded_composite(weight, a, b, Nquad,
+                                                               singularities))
+        M = 1
 
     integrand = weight
 
-    for n in range(1, N):
+    for n in range(M, N):
 
-        breaks = singularity_list.copy()
         pnminus1_zeros = gauss_quadrature_driver(ab, n-1)[0]
-        roots = np.hstack([0, pnminus1_zeros])
-        # use array_unique because when n = 2, pnminus1_zeros = ab[1, 0] is
-        # very close to 0.
-
-        # Have to do this array_unique, or will cause Overlapping singularities
-        # problem.
-        breaks += [[z, 0, 0] for z in roots]
+        # Merge with a tolerance because when n = 2, pnminus1_zeros = ab[1, 0]
+        # may be very close to 0, which would otherwise cause an Overlapping
+        # singularities problem.
+        roots = merge_sorted_unique([0., pnminus1_zeros], tol=1e-12)
+        breaks = _append_breaks(singularities, roots)
 
         qlc = np.prod(leading_coefficient_driver(n, ab)[-1])**2
 
         ab[n, 0] = gq_modification_unbounded_composite(integrand, a, b,
                                                        n+1+Nquad, breaks,
-                                                       roots=np.zeros(1,),
+                                                       roots=_snap_to_breaks(np.zeros(1,), roots),
                                                        quadroots=pnminus1_zeros,
                                                        leading_coefficient=qlc)
 
         if n == 1:
             pnminus1_zeros = np.hstack([ab[n, 0], pnminus1_zeros])
             s = gq_modification_unbounded_composite(integrand, a, b, n+1+Nquad,
-                                                    singularity_list,
+                                                    singularities,
                                                     quadroots=pnminus1_zeros,
                                                     leading_coefficient=qlc)
         else:
             pnminus1_zeros = np.hstack([ab[n, 0], pnminus1_zeros])
             s_1 = gq_modification_unbounded_composite(integrand, a, b, n+1+Nquad,
-                                                      singularity_list,
+                                                      singularities,
                                                       quadroots=pnminus1_zeros,
                                                       leading_coefficient=qlc)
 
@@ -386,16 +493,19 @@ def stieltjes_unbounded_composite(a, b, weight, N, singularity_list, Nquad=10):
             qlc = np.prod(leading_coefficient_driver(n-1, ab)[-1])**2
             s_2 = gq_modification_unbounded_composite(integrand, a, b,
                                                       n+1+Nquad,
-                                                      singularity_list,
+                                                      singularities,
                                                       quadroots=pnminus2_zeros,
                                                       leading_coefficient=qlc)
 
             # note this roots may cause issues since it contains two very close
             # numbers
             # below pnminus1_zeros already includes ab[n, 0]
-            roots = np.hstack([pnminus1_zeros, pnminus2_zeros]) 
-            breaks_new = singularity_list.copy()
-            breaks_new += [[z, 0, 0] for z in roots]
+            breaks_new = merge_sorted_unique([pnminus1_zeros[:1],
+                                              pnminus1_zeros[1:],
+                                              pnminus2_zeros], tol=1e-12)
+            roots = _snap_to_breaks(np.hstack([pnminus1_zeros, pnminus2_zeros]),
+                                    breaks_new)
+            breaks_new = _append_breaks(singularities, breaks_new)
             qlc = np.prod(leading_coefficient_driver(n, ab)[-2:])
             s_3 = gq_modification_unbounded_composite(integrand, a, b,
                                                       n+1+Nquad, breaks_new,
@@ -413,7 +523,7 @@ def stieltjes_unbounded_composite(a, b, weight, N, singularity_list, Nquad=10):
 """
 Arbitrary polynomial chaos expansion method
 """
-def expansion_coeff(m, n):
+def expansion_coeff(m, n, hankel=None):
     """
     Params
     ______
@@ -430,6 +540,10 @@ def expansion_coeff(m, n):
     the highest order of polynomials expansion
     p_n(x) = \sum_{i=0}^n c_i^(n) x^i
 
+    hankel: numpy array, optional
+    precomputed Hankel matrix with hankel[i,j] = m_{i+j}, of size at least
+    n x (n+1). If not given, it is assembled from m.
+
     Returns
     ------
     c: numpy array, shape (n+1,)
@@ -437,16 +551,24 @@ def expansion_coeff(m, n):
     c = [c_0^(n), ..., c_n^(n)]
     """
     assert len(m) >= 2*n
-    M = np.zeros([n+1, n+1])
-    for i in range(n):
-        M[i, :] = m[i:i+n+1]
-    M[n, n] = 1.
-    b = np.zeros(n+1,)
-    b[n] = 1
-    c = np.linalg.solve(M, b)
+    if hankel is None:
+        H = m[np.arange(n)[:, np.newaxis] + np.arange(n+1)]
+    else:
+        H = hankel[:n, :n+1]
+
+    # The last row of M fixes c_n = 1, and the leading n x n Hankel block is
+    # positive definite for a positive measure, so the remaining coefficients
+    # solve H[:n,:n] c[:n] = -H[:n,n] by Cholesky. Fall back to a general
+    # solve if the moments are too ill-conditioned for the factorization.
+    c = np.ones(n+1,)
+    if n > 0:
+        try:
+            c[:n] = cho_solve(cho_factor(H[:, :n]), -H[:, n])
+        except np.linalg.LinAlgError:
+            c[:n] = np.linalg.solve(H[:, :n], -H[:, n])
     return c
 
-def normal_const(m, n, c):
+def normal_const(m, n, c, hankel=None):
     """
     Params
     ------
@@ -467,33 +589,44 @@ def normal_const(m, n, c):
     vector of expansion coeffcients for monic polynomials
     c = [c_0^(n), ..., c_n^(n)]
 
+    hankel: numpy array, optional
+    precomputed Hankel matrix with hankel[i,j] = m_{i+j}, of size at least
+    (n+1) x (n+1). If not given, it is assembled from m.
+
     Returns
     ------
     normal_c: float
     normalized constant for expansion coefficient vector c
     """
     assert len(m) >= 2*n+1
-    M = np.zeros([n+1, n+1])
-    for i in range(n+1):
-        M[i, :] = m[i:i+n+1]
+    if hankel is None:
+        M = m[np.arange(n+1)[:, np.newaxis] + np.arange(n+1)]
+    else:
+        M = hankel[:n+1, :n+1]
     normal_c = np.sqrt(c.dot(M).dot(c))
     return normal_c
 
 def aPC(m, N):
     C = np.zeros([N, N])
     NC = np.zeros(N,)
+    # Every expansion_coeff/normal_const solve uses a leading block of the
+    # same Hankel moment matrix, so assemble it once.
+    H = m[np.arange(N)[:, np.newaxis] + np.arange(N)]
     for i in range(N):
-        c = expansion_coeff(m, i)
-        NC[i] = normal_const(m, i, c)
-        C[0:i+1, i] = expansion_coeff(m, i) / NC[i]
+        c = expansion_coeff(m, i, hankel=H)
+        NC[i] = normal_const(m, i, c, hankel=H)
+        C[0:i+1, i] = c / NC[i]
+
+    # Leading and subleading coefficients of the orthonormal polynomials
+    # are the main and first super-diagonals of C; with C[-1, 0] taken as 0
+    # the i = 1 entry follows the same formula as i >= 2.
+    lead = np.diag(C)
+    sublead = np.diag(C, 1)
 
     ab = np.zeros([N, 2])
     ab[0, 1] = NC[0]
-    ab[1, 1] = C[0, 0] / C[1, 1]
-    ab[1, 0] = -C[0, 1] / C[1, 1]
-    for i in range(2, N):
-        ab[i, 1] = C[i-1, i-1] / C[i, i]
-        ab[i, 0] = (C[i-2, i-1] - ab[i, 1] * C[i-1, i]) / C[i-1, i-1]
+    ab[1:, 1] = lead[:-1] / lead[1:]
+    ab[1:, 0] = (np.hstack([0., sublead[:-1]]) - ab[1:, 1] * sublead) / lead[:-1]
 
     return ab
 
@@ -5,9 +5,21 @@ def array_unique(a, tol = 1e-8):
     Given an 1d numpy array, selects eps-close unique elements and delete, then sort.
     """
     a_sort = np.sort(a)
-    seq_diff = a_sort[1:] - a_sort[:-1]
-    ind = np.where(seq_diff < tol)
-    return np.delete(a_sort, ind)
+    keep = np.ones(a_sort.size, dtype=bool)
+    keep[:-1] = np.diff(a_sort) >= tol
+    return a_sort[keep]
+
+def merge_sorted_unique(arrays, tol = 1e-8):
+    """
+    Given a list of 1d numpy arrays, each already sorted, returns their sorted
+    merge with eps-close duplicates removed. The merge sort runs in linear
+    time on the presorted pieces, and duplicates are dropped with a mask.
+    """
+    a = np.concatenate([np.atleast_1d(np.asarray(ai, dtype=float)) for ai in arrays])
+    a = np.sort(a, kind='mergesort')
+    keep = np.ones(a.size, dtype=bool)
+    keep[:-1] = np.diff(a) >= tol
+    return a[keep]
 
 if __name__ == '__main__':
     x = np.array([1, 2, 1-1e-12, 2-1e-4])
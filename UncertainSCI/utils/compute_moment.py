@@ -15,13 +15,13 @@ def compute_moment_bounded(a, b, weight, n, singularity_list, Nquad=10):
 
     subintervals = compute_subintervals(a, b, singularity_list)
 
-    m = np.zeros(2*n+1,)
-    for i in range(len(m)):
-        def integrand(x):
-            return weight(x) * x**i
-        # integrand = lambda x: weight(x) * x**i
-        m[i] = gq_modification_composite(integrand, a, b, i+1+Nquad,
-                                         subintervals)
+    # All 2n+1 monomials are integrated in one pass with a shared quadrature
+    # rule; the integrand returns the weighted Vandermonde matrix.
+    def integrand(x):
+        return np.reshape(weight(x), [-1, 1]) * np.vander(x, 2*n+1,
+                                                          increasing=True)
+
+    m = gq_modification_composite(integrand, a, b, 2*n+1+Nquad, subintervals)
 
     return m
 
@@ -30,24 +30,18 @@ def compute_moment_unbounded(a, b, weight, n, singularity_list, Nquad=10):
 
     assert a < b
 
-    m = np.zeros(2*n+1,)
-    for i in range(len(m)):
-        def integrand(x):
-            return weight(x) * x**i
-        # integrand = lambda x: weight(x) * x**i
-        m[i] = gq_modification_unbounded_composite(integrand, a, b, i+1+Nquad,
-                                                   singularity_list)
+    def integrand(x):
+        return np.reshape(weight(x), [-1, 1]) * np.vander(x, 2*n+1,
+                                                          increasing=True)
+
+    m = gq_modification_unbounded_composite(integrand, a, b, 2*n+1+Nquad,
+                                            singularity_list)
 
     return m
 
 
 def compute_moment_discrete(xg, wg, n):
-    m = np.zeros(2*n+1,)
-    for i in range(len(m)):
-        # integrand = lambda x: x**i
-        def integrand(x):
-            return x**i
-        m[i] = np.sum(integrand(xg) * wg)
+    m = np.dot(wg, np.vander(xg, 2*n+1, increasing=True))
 
     return m
 
@@ -3,76 +3,80 @@ import numpy as np
 from UncertainSCI.families import jacobi_recurrence_values,\
                                   jacobi_weight_normalized
 
-from UncertainSCI.opoly1d import linear_modification, quadratic_modification
+from UncertainSCI.opoly1d import linear_modification_batch, \
+        quadratic_modification_batch
 from UncertainSCI.opoly1d import gauss_quadrature_driver
 
 # from UncertainSCI.utils.compute_subintervals import compute_subintervals
 
+# Jacobi recurrence coefficients used by gq_modification, keyed by the
+# (alpha, beta) pair. Each entry holds the longest table computed so far.
+_jacobi_recurrence_cache = {}
+
+
+def _jacobi_recurrence(N, alpha, beta):
+    """
+    Returns a copy of jacobi_recurrence_values(N, alpha, beta), reusing
+    coefficients previously computed for the same (alpha, beta). The
+    coefficients are independent of N, so a longer cached table is sliced.
+    """
+
+    key = (float(alpha), float(beta))
+    ab = _jacobi_recurrence_cache.get(key)
+    if ab is None or ab.shape[0] < N+1:
+        ab = jacobi_recurrence_values(N, alpha, beta)
+        _jacobi_recurrence_cache[key] = ab
+
+    return ab[:(N+1), :].copy()
+
 
 def compute_subintervals(a, b, singularity_list):
     """
     Returns an M x 4 numpy array, where each row contains the left-hand point,
     right-hand point, left-singularity strength, and right-singularity
     strength.
+
+    singularity_list is either a list of [location, left strength, right
+    strength] entries or an equivalent S x 3 numpy array. Callers that build
+    breakpoints repeatedly should pass the array form, which is used without
+    being parsed or copied.
     """
 
     # Tolerance for resolving internal versus boundary singularities.
     tol = 1e-12
-    singularities = np.array([entry[0] for entry in singularity_list])
-    strength_left = np.array([entry[1] for entry in singularity_list])
-    strength_right = np.array([entry[2] for entry in singularity_list])
+
+    # Rows of data are [singularity, left strength, right strength]
+    data = np.asarray(singularity_list, dtype=float).reshape([-1, 3])
 
     # We can discard any singularities that lie to the left of a or the right
-    # of b
-    discard = []
-    for (ind, s) in enumerate(singularities):
-        if s < a-tol or s > b+tol:
-            discard.append(ind)
-
-    singularities = np.delete(singularities, discard)
-    strength_left = np.delete(strength_left, discard)
-    strength_right = np.delete(strength_right, discard)
-
-    # Sort remaining valid singularities
-    order = np.argsort(singularities)
-    singularities = singularities[order]
-    strength_left = strength_left[order]
-    strength_right = strength_right[order]
+    # of b, and sort the remaining valid singularities
+    data = data[(data[:, 0] >= a-tol) & (data[:, 0] <= b+tol), :]
+    data = data[np.argsort(data[:, 0], kind='stable'), :]
 
     # Make sure there aren't doubly-specified singularities
-    if np.any(np.diff(singularities) < tol):
+    if np.any(np.diff(data[:, 0]) < tol):
         raise ValueError("Overlapping singularities were specified. \
                           Singularities must be unique")
 
-    S = singularities.size
+    S = data.shape[0]
 
-    if S > 0:
+    # Figure out if singularities match endpoints; if not, the endpoints are
+    # added as breakpoints with zero strength.
+    a_sing = S > 0 and np.abs(data[0, 0] - a) <= tol
+    b_sing = S > 0 and np.abs(data[-1, 0] - b) <= tol
 
-        # Extend the singularities lists if we need to add interval endpoints
-        a_sing = np.abs(singularities[0] - a) <= tol
-        b_sing = np.abs(singularities[-1] - b) <= tol
+    P = S + (not a_sing) + (not b_sing)
+    breaks = np.zeros([P, 3])
+    breaks[0, 0], breaks[-1, 0] = a, b
+    offset = 0 if a_sing else 1
+    breaks[offset:offset+S, :] = data
 
-        # Figure out if singularities match endpoints
-        if not b_sing:
-            singularities = np.hstack([singularities, b])
-            strength_left = np.hstack([strength_left, 0])
-            strength_right = np.hstack([strength_right, 0])  # Doesn't matter
-        if not a_sing:
-            singularities = np.hstack([a, singularities])
-            strength_left = np.hstack([0, strength_left])  # Doesn't matter
-            strength_right = np.hstack([0, strength_right])  # Doesn't matter
-
-        # Use the singularities lists to identify subintervals
-        S = singularities.size
-        subintervals = np.zeros([S-1, 4])
-        for q in range(S-1):
-            subintervals[q, :] = [singularities[q], singularities[q+1],
-                                  strength_right[q], strength_left[q+1]]
-
-    else:
-
-        subintervals = np.zeros([1, 4])
-        subintervals[0, :] = [a, b, 0, 0]
+    # Consecutive breakpoints identify subintervals
+    subintervals = np.empty([P-1, 4])
+    subintervals[:, 0] = breaks[:-1, 0]
+    subintervals[:, 1] = breaks[1:, 0]
+    subintervals[:, 2] = breaks[:-1, 2]
+    subintervals[:, 3] = breaks[1:, 1]
 
     return subintervals
 
@@ -108,10 +112,39 @@ def gq_modification(integrand, a, b, N, roots=np.zeros(0),
     The procedure then performs measure modifications on w, absorbing q into
     the measure. An N-point Gaussian quadrature rule with respect to this
     modified measure is used to integrate (integrand / w).
+
+    integrand is called once per quadrature rule with the full array of
+    nodes, so it should be a vectorized (numpy ufunc-style) function rather
+    than one that loops over points in Python.
+
+    integrand may be vector-valued: if integrand(x) returns an array of shape
+    (x.size, K), the output is the length-K array of integrals computed with
+    one shared quadrature rule.
     """
 
     assert (a < b) and (N > 0)
 
+    ab, G, gamma, sgn = _gq_modification_measure(a, b, N, roots=roots,
+                                                  quadroots=quadroots,
+                                                  Nmax=Nmax, gamma=gamma,
+                                                  leading_coefficient=leading_coefficient)
+
+    return _gq_modification_integral(integrand, a, b, N+G, ab, gamma, sgn)
+
+
+def _gq_modification_measure(a, b, N, roots=np.zeros(0),
+                             quadroots=np.zeros(0), Nmax=100,
+                             gamma=(0, 0), leading_coefficient=1.):
+    """
+    Computes the modified Jacobi measure used by gq_modification.
+
+    Returns (ab, G, gamma, sgn), where ab holds at least N+G+1 recurrence
+    coefficient pairs of the modified measure on [-1,1], G is the number of
+    extra quadrature nodes absorbed from the integer parts of the input
+    gamma, gamma are the (non-positive) Jacobi parameters of the weight that
+    is divided out, and sgn is the sign of q on (a,b).
+    """
+
     # If the gamma parameters are > 0, then we write
     #   gamma[0] = gam + G,
     # where gam \in (-1,0) and G is a positive integer. And similarly for
@@ -119,33 +152,30 @@ def gq_modification(integrand, a, b, N, roots=np.zeros(0),
     #
     # Then we take the Jacobi weight to be w associated with gam,
     # and set N, Nmax += G
+    gamma = list(gamma)
+    G = 0
     for ind in range(2):
         if gamma[ind] > 0:
-            G = np.ceil(gamma[ind])
-            gam = gamma[ind] - G
-            N += int(G)
-            Nmax += int(G)
-            gamma[ind] = gam
+            Gind = int(np.ceil(gamma[ind]))
+            G += Gind
+            gamma[ind] -= Gind
 
     assert (gamma[0] <= 0.) and (gamma[1] <= 0.)
-    Nmax = max(Nmax, N)
+    Nmax = max(Nmax+G, N+G)
 
     R = roots.size
     Q = quadroots.size
 
     # Map everything to [-1,1], and scale by Jacobian afterward
     jac = 2/(b-a)
+    midpoint = (a+b)/2
 
     def map_to_standard(x):  # Maps [a,b] to [-1,1]
-        return jac*(x - a) - 1
+        return jac*(x - midpoint)
     # map_to_standard = lambda x: jac*(x - a) - 1
 
-    def map_to_ab(x):  # Maps [-1,1], to [a,b]
-        return (x + 1) / jac + a
-    # map_to_ab = lambda x: (x+1)/jac + a
-
     # Recurrence coefficients for appropriate Jacobi probability measure
-    ab = jacobi_recurrence_values(Nmax+R+2*Q, gamma[0], gamma[1])
+    ab = _jacobi_recurrence(Nmax+R+2*Q, gamma[0], gamma[1])
     ab[0, 1] = 1.
 
     # The sign of q is determined by how many zeros lie to the right of (a,b)
@@ -162,42 +192,70 @@ def gq_modification(integrand, a, b, N, roots=np.zeros(0),
         C = np.exp(np.log(np.abs(leading_coefficient))/(R+2*Q))/jac
         Csqrt = np.sqrt(C)
 
-        for x0 in quadroots:
-            ab = quadratic_modification(ab, map_to_standard(x0))
-            ab[0, 1] *= C
-        for x0 in roots:
-            ab = linear_modification(ab, map_to_standard(x0))
-            ab[0, 1] *= Csqrt
+        ab = quadratic_modification_batch(ab, map_to_standard(quadroots), C)
+        ab = linear_modification_batch(ab, map_to_standard(roots), Csqrt)
     else:
-        ab[0, 1] *= np.abs(leading_coefficient)
+        ab[0, 1] *= np.sqrt(np.abs(leading_coefficient))
+
+    return ab, G, gamma, sgn
+
+
+def _gq_modification_integral(integrand, a, b, N, ab, gamma, sgn):
+    """
+    Applies the N-point Gauss rule of the modified measure computed by
+    _gq_modification_measure to integrand over [a,b].
+    """
+
+    # Half-width and midpoint are bound once so the map from [-1,1] to [a,b]
+    # is a single multiply-add per node.
+    halfwidth = (b-a)/2
+    midpoint = (a+b)/2
+
+    def map_to_ab(x):  # Maps [-1,1], to [a,b]
+        return halfwidth*x + midpoint
+    # map_to_ab = lambda x: (x+1)/jac + a
 
     x, w = gauss_quadrature_driver(ab, N)
 
-    # Gauss quadrature
-    integral = np.sum(w * integrand(map_to_ab(x)) /
-                      jacobi_weight_normalized(x, gamma[0], gamma[1]))
+    # Gauss quadrature: form the rule weights divided by the Jacobi weight
+    # first, so the sum is a single dot product with the integrand values.
+    wq = w / jacobi_weight_normalized(x, gamma[0], gamma[1])
+    integral = np.dot(wq, integrand(map_to_ab(x)))
 
     # Jacobian factor for the affine map and sign:
-    integral *= sgn/jac
+    integral *= sgn*halfwidth
 
     return integral
 
 
 def gq_modification_adaptive(integrand, a, b, N, N_step=10, tol=1e-12,
                              **kwargs):
-    s = gq_modification(integrand, a, b, N, **kwargs)
-    s_new = gq_modification(integrand, a, b, N=N + N_step, **kwargs)
+    # The modified measure does not depend on N, so it is computed once and
+    # only rebuilt (with twice the size) when N outgrows its coefficients.
+    assert (a < b) and (N > 0)
+
+    ab, G, gamma, sgn = _gq_modification_measure(a, b, N, **kwargs)
 
-    while np.abs(s - s_new) > tol:
+    def integral(N):
+        nonlocal ab
+        if ab.shape[0] < N+G+1:
+            kwargs['Nmax'] = 2*N
+            ab = _gq_modification_measure(a, b, N, **kwargs)[0]
+        return _gq_modification_integral(integrand, a, b, N+G, ab, gamma, sgn)
+
+    s = integral(N)
+    s_new = integral(N + N_step)
+
+    while np.max(np.abs(s - s_new)) > tol:
         s = s_new
         N += N_step
-        s_new = gq_modification(integrand, a, b, N=N, **kwargs)
+        s_new = integral(N)
     return s_new
 
 
 def gq_modification_composite(integrand, a, b, N,
                               subintervals=np.zeros([0, 4]), adaptive=True,
-                              **kwargs):
+                              parallel=False, **kwargs):
     """
     Uses a composite quadrature rule where each subinterval uses
     gq_modification to integrate. The integral is split into
@@ -215,6 +273,11 @@ def gq_modification_composite(integrand, a, b, N,
 
       [a, b, 0, 0]
 
+    If parallel is True, the subinterval integrals are evaluated concurrently
+    on a thread pool and summed in subinterval order. This only pays off when
+    there are many subintervals and integrand releases the GIL (e.g., numpy
+    ufuncs on large arrays).
+
     Typical keyword arguments that should be input to this function are:
 
         - quadroots
@@ -223,22 +286,33 @@ def gq_modification_composite(integrand, a, b, N,
 
     See gq_modification for a description of these inputs.
     """
-    integral = 0.
 
     if subintervals.shape[0] == 0:
         subintervals = np.zeros([1, 4])
         subintervals[0, :] = [a, b, 0, 0]
 
-    for q in range(subintervals.shape[0]):
+    def subintegral(q):
         gamma = [subintervals[q, 3], subintervals[q, 2]]
         if adaptive:
-            integral += gq_modification_adaptive(integrand, subintervals[q, 0],
-                                                 subintervals[q, 1], N,
-                                                 gamma=gamma, **kwargs)
+            return gq_modification_adaptive(integrand, subintervals[q, 0],
+                                            subintervals[q, 1], N,
+                                            gamma=gamma, **kwargs)
         else:
-            integral += gq_modification(integrand, subintervals[q, 0],
-                                        subintervals[q, 1], N, gamma=gamma,
-                                        **kwargs)
+            return gq_modification(integrand, subintervals[q, 0],
+                                   subintervals[q, 1], N, gamma=gamma,
+                                   **kwargs)
+
+    M = subintervals.shape[0]
+    if parallel and M > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor() as executor:
+            partials = list(executor.map(subintegral, range(M)))
+    else:
+        partials = [subintegral(q) for q in range(M)]
+
+    integral = 0.
+    for partial in partials:
+        integral += partial
 
     return integral
 
@@ -260,67 +334,43 @@ def gq_modification_unbounded_composite(integrand, a, b, N, singularity_list,
 
     So We temporarily put this method here, maybe change this later for bettter
     consideration.
+
+    The integration domain is extended by panels whose width starts at step
+    and doubles with each panel, so a truncation radius R is reached after
+    O(log(R/step)) panels.
     """
 
-    if a == -np.inf and b == np.inf:
-        # l = -1.; r = 1.
-        le, r = -1., 1.
-        subintervals = compute_subintervals(le, r, singularity_list)
-        integral = gq_modification_composite(integrand, le, r, N, subintervals,
-                                             adaptive, **kwargs)
-
-        integral_new = 1.
-        while np.abs(integral_new) > tol:
-            r = le
-            le = r - step
+    def tail(x0, direction, width):
+        # Integrates over [x0, direction*inf) by consecutive panels, the
+        # first of the given width and each next one twice as wide, until
+        # a panel contributes less than tol.
+        integral = 0.
+        while True:
+            x1 = x0 + direction*width
+            le, r = min(x0, x1), max(x0, x1)
             subintervals = compute_subintervals(le, r, singularity_list)
             integral_new = gq_modification_composite(integrand, le, r, N,
                                                      subintervals, adaptive,
                                                      **kwargs)
             integral += integral_new
+            if np.max(np.abs(integral_new)) <= tol:
+                return integral
+            x0 = x1
+            width *= 2
 
+    if a == -np.inf and b == np.inf:
         le, r = -1., 1.
-        # l = -1.; r = 1.
-        integral_new = 1.
-        while np.abs(integral_new) > tol:
-            le = r
-            r = le + step
-            subintervals = compute_subintervals(le, r, singularity_list)
-            integral_new = gq_modification_composite(integrand, le, r, N,
-                                                     subintervals, adaptive,
-                                                     **kwargs)
-            integral += integral_new
-
     elif a == -np.inf:
-        r = b
-        le = b - step
-        subintervals = compute_subintervals(le, r, singularity_list)
-        integral = gq_modification_composite(integrand, le, r, N, subintervals,
-                                             adaptive, **kwargs)
-        integral_new = 1.
-        while np.abs(integral_new) > tol:
-            r = le
-            le = r - step
-            subintervals = compute_subintervals(le, r, singularity_list)
-            integral_new = gq_modification_composite(integrand, le, r, N,
-                                                     subintervals, adaptive,
-                                                     **kwargs)
-            integral += integral_new
-
+        le, r = b - step, b
     elif b == np.inf:
-        le = a
-        r = a + step
-        subintervals = compute_subintervals(le, r, singularity_list)
-        integral = gq_modification_composite(integrand, le, r, N, subintervals,
-                                             adaptive, **kwargs)
-        integral_new = 1.
-        while np.abs(integral_new) > tol:
-            le = r
-            r = le + step
-            subintervals = compute_subintervals(le, r, singularity_list)
-            integral_new = gq_modification_composite(integrand, le, r, N,
-                                                     subintervals, adaptive,
-                                                     **kwargs)
-            integral += integral_new
+        le, r = a, a + step
+
+    subintervals = compute_subintervals(le, r, singularity_list)
+    integral = gq_modification_composite(integrand, le, r, N, subintervals,
+                                         adaptive, **kwargs)
+    if a == -np.inf:
+        integral += tail(le, -1, step)
+    if b == np.inf:
+        integral += tail(r, 1, step)
 
     return integral
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from UncertainSCI.opoly1d import chandrupatla_driver
+
+
+class ChandrupatlaTestCase(unittest.TestCase):
+    """
+    Tests for the vectorized bracketed root finder.
+    """
+
+    def setUp(self):
+        self.longMessage = True
+
+    def test_roots(self):
+        """ Roots of a monotone function on common brackets """
+
+        u = np.array([0.5, 0.9, 0.125, 1e-6])
+        x = chandrupatla_driver(lambda xx: xx**3, u, np.zeros(u.size),
+                                np.ones(u.size))
+
+        delta = np.max(np.abs(x - np.cbrt(u)))
+        self.assertAlmostEqual(delta, 0, delta=1e-10)
+
+    def test_endpoint_roots(self):
+        """ Brackets whose endpoints are already roots """
+
+        u = np.array([0., 1., 0.5])
+        a = np.array([0., 0., 0.])
+        b = np.array([1., 1., 1.])
+
+        calls = []
+
+        def F(xx):
+            calls.append(xx.size)
+            return xx
+
+        x = chandrupatla_driver(F, u, a, b)
+
+        self.assertEqual(x[0], 0.)
+        self.assertEqual(x[1], 1.)
+        self.assertAlmostEqual(x[2], 0.5, delta=1e-10)
+
+        # After the endpoint evaluations, only the third entry is iterated
+        self.assertTrue(all(size == 1 for size in calls[2:]))
+
+    def test_non_bracketing(self):
+        """ A bracket not containing the root raises ValueError """
+
+        with self.assertRaises(ValueError):
+            chandrupatla_driver(lambda xx: xx**3, [0.5, 8.0, 0.125],
+                                [0., 0., 0.], [1., 1., 1.])
+
+
+if __name__ == "__main__":
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+from scipy import special as sp
+
+from UncertainSCI.utils.compute_moment import compute_moment_bounded, \
+        compute_moment_unbounded, compute_moment_discrete, compute_freud_moment
+
+
+class MomentTestCase(unittest.TestCase):
+    """
+    Tests for moment computation.
+    """
+
+    def setUp(self):
+        self.longMessage = True
+
+    def test_moment_bounded(self):
+        """ Moments of the Jacobi weight function on [-1,1].  """
+
+        alpha = -1. + 5*np.random.rand(1)[0]
+        beta = -1. + 5*np.random.rand(1)[0]
+        weight = lambda x: (1-x)**alpha * (1+x)**beta
+        n = 5
+
+        mom = compute_moment_bounded(-1., 1., weight, n, [[-1., 0., beta], [1., alpha, 0.]])
+
+        # Exact moments from x = 2t - 1 and a binomial expansion of x**i
+        exact = np.zeros(2*n+1)
+        for i in range(2*n+1):
+            k = np.arange(i+1)
+            exact[i] = 2**(alpha+beta+1) * np.sum(sp.comb(i, k) * 2.**k * (-1.)**(i-k) *
+                                                  sp.beta(k+beta+1, alpha+1))
+
+        delta = 1e-10
+        errstr = 'Failed for alpha={0:1.3f}, beta={1:1.3f}'.format(alpha, beta)
+        self.assertAlmostEqual(np.linalg.norm(mom - exact, ord=np.inf) / np.linalg.norm(exact, ord=np.inf), 0,
+                               delta=delta, msg=errstr)
+
+    def test_moment_unbounded(self):
+        """ Moments of Freud weight functions on (-inf, inf) and of exp(-x) on [0, inf).  """
+
+        n = 5
+        delta = 1e-12
+
+        for rho, m in [(0., 2.), (0.4, 2.), (1.3, 4.)]:
+            weight = lambda x: np.abs(x)**rho * np.exp(-np.abs(x)**m)
+            singularity_list = [[0., rho, rho]] if rho != 0. else []
+
+            mom = compute_moment_unbounded(-np.inf, np.inf, weight, n, singularity_list)
+            exact = compute_freud_moment(rho, m, n)
+
+            errstr = 'Failed for rho={0:1.3f}, m={1:1.3f}'.format(rho, m)
+            self.assertAlmostEqual(np.linalg.norm(mom - exact, ord=np.inf) / np.linalg.norm(exact, ord=np.inf), 0,
+                                   delta=delta, msg=errstr)
+
+        mom = compute_moment_unbounded(0., np.inf, lambda x: np.exp(-x), n, [])
+        exact = sp.factorial(np.arange(2*n+1))
+        self.assertAlmostEqual(np.linalg.norm(mom/exact - 1, ord=np.inf), 0, delta=delta)
+
+    def test_moment_discrete(self):
+        """ Moments of a discrete measure.  """
+
+        M = np.random.randint(5, 50)
+        xg = 2*np.random.rand(M) - 1
+        wg = np.random.rand(M)
+        n = 5
+
+        mom = compute_moment_discrete(xg, wg, n)
+        exact = np.array([np.sum(wg * xg**i) for i in range(2*n+1)])
+
+        delta = 1e-12
+        errstr = 'Failed for M={0:d}'.format(M)
+        self.assertAlmostEqual(np.linalg.norm(mom - exact, ord=np.inf), 0, delta=delta, msg=errstr)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -34,6 +34,21 @@ class IDistTestCase(unittest.TestCase):
 
         self.assertAlmostEqual(np.linalg.norm(x1-x2, ord=np.inf), 0., delta=delta, msg=errstr)
 
+    def test_idistinv_Hermite_tails(self):
+        """Hermite inversed induced distribution function at extreme tails."""
+
+        H = HermitePolynomials()
+        u = np.array([0., 1e-300, 1e-16, 1e-15, 1e-14, 1e-12,
+                      1-1e-12, 1-1e-14, 1-1e-15, 1-1e-16, 1.])
+
+        delta = 1e-12
+        for n in range(6):
+            x = H.idistinv(u, n)
+
+            errstr = 'Failed for n={0:d}'.format(n)
+            self.assertTrue(np.all(np.isfinite(x)), msg=errstr)
+            self.assertAlmostEqual(np.linalg.norm(H.idist(x, n)-u, ord=np.inf), 0., delta=delta, msg=errstr)
+
 
 if __name__ == "__main__":
 
@@ -2,7 +2,8 @@ import unittest
 
 import numpy as np
 
-from UncertainSCI.families import JacobiPolynomials
+from UncertainSCI.families import JacobiPolynomials, DiscreteChebyshevPolynomials
+from UncertainSCI.opoly1d import eval_pair_driver
 
 
 class JacobiTestCase(unittest.TestCase):
@@ -46,6 +47,83 @@ class JacobiTestCase(unittest.TestCase):
 
         self.assertAlmostEqual(np.linalg.norm(errs, ord=np.inf), 0, delta=delta, msg=errstr)
 
+    def test_eval_pair(self):
+        """ Evaluation of consecutive-degree polynomial pairs.  """
+
+        alpha = -1. + 10*np.random.rand(1)[0]
+        beta = -1. + 10*np.random.rand(1)[0]
+        J = JacobiPolynomials(alpha=alpha, beta=beta)
+
+        n = int(np.ceil(60*np.random.rand(1)))
+        x = -1. + 2*np.random.rand(50)
+
+        P = J.eval(x, [n, n+1])
+        pn, pn1 = eval_pair_driver(x, n, J.recurrence(n+1))
+
+        delta = 1e-8
+        errstr = 'Failed for alpha={0:1.3f}, beta={1:1.3f}, n={2:d}'.format(alpha, beta, n)
+        self.assertAlmostEqual(np.linalg.norm(P[:, 0]-pn, ord=np.inf), 0, delta=delta, msg=errstr)
+        self.assertAlmostEqual(np.linalg.norm(P[:, 1]-pn1, ord=np.inf), 0, delta=delta, msg=errstr)
+
+    def test_clenshaw(self):
+        """ Clenshaw evaluation of polynomial expansions.  """
+
+        alpha = -1. + 10*np.random.rand(1)[0]
+        beta = -1. + 10*np.random.rand(1)[0]
+        J = JacobiPolynomials(alpha=alpha, beta=beta)
+
+        N = int(np.ceil(60*np.random.rand(1)))
+        x = -1. + 2*np.random.rand(50)
+        c = np.random.randn(N+1, 3)
+
+        P = J.eval(x, range(N+1))
+        f = P.dot(c)
+
+        # Relative to the size of the expansion, which can be large near the
+        # endpoints for large alpha, beta
+        delta = 1e-8*max(1., np.linalg.norm(f, ord=np.inf))
+        errstr = 'Failed for alpha={0:1.3f}, beta={1:1.3f}, N={2:d}'.format(alpha, beta, N)
+        self.assertAlmostEqual(np.linalg.norm(J.clenshaw(x, c) - f, ord=np.inf), 0, delta=delta, msg=errstr)
+        self.assertAlmostEqual(np.linalg.norm(J.clenshaw(x, c[:, 0]) - f[:, 0], ord=np.inf), 0, delta=delta, msg=errstr)
+        self.assertAlmostEqual(np.linalg.norm(J.clenshaw(x, c[:1, 0]) - P[:, 0]*c[0, 0], ord=np.inf), 0,
+                               delta=delta, msg=errstr)
+
+        # A family whose eval maps x from a non-standard domain first
+        M = 12
+        D = DiscreteChebyshevPolynomials(M=M, domain=[-1., 3.])
+        x = -1. + 4*np.random.rand(50)
+        c = np.random.randn(M, 3)
+
+        f = D.eval(x, range(M)).dot(c)
+        delta = 1e-8*max(1., np.linalg.norm(f, ord=np.inf))
+        self.assertAlmostEqual(np.linalg.norm(D.clenshaw(x, c) - f, ord=np.inf), 0, delta=delta)
+
+    def test_christoffel(self):
+        """ Christoffel function evaluation.  """
+
+        alpha = -1. + 10*np.random.rand(1)[0]
+        beta = -1. + 10*np.random.rand(1)[0]
+        J = JacobiPolynomials(alpha=alpha, beta=beta)
+
+        k = int(np.ceil(30*np.random.rand(1)))
+        x = -1. + 2*np.random.rand(50)
+
+        lam = np.sqrt(k/np.sum(J.eval(x, range(k))**2, axis=1))
+        errstr = 'Failed for alpha={0:1.3f}, beta={1:1.3f}, k={2:d}'.format(alpha, beta, k)
+        self.assertAlmostEqual(np.linalg.norm(J.christoffel_function(x, k) - lam, ord=np.inf), 0,
+                               delta=1e-8, msg=errstr)
+
+        # A family whose eval maps x from a non-standard domain first
+        D = DiscreteChebyshevPolynomials(M=10, domain=[-1., 3.])
+        x = np.linspace(-1., 3., 7)
+        k = 4
+
+        lam = np.sqrt(k/np.sum(D.eval(x, range(k))**2, axis=1))
+        self.assertAlmostEqual(np.linalg.norm(D.christoffel_function(x, k) - lam, ord=np.inf), 0, delta=1e-12)
+
+        lam = np.array([0.697, 1.149, 1.141, 1.322, 1.141, 1.149, 0.697])
+        self.assertAlmostEqual(np.linalg.norm(D.christoffel_function(x, k) - lam, ord=np.inf), 0, delta=1e-3)
+
     def test_gq(self):
         """Gaussian quadrature integration accuracy"""
 
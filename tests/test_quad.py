@@ -90,7 +90,68 @@ class QuadTestCase(unittest.TestCase):
         errstr = 'Failed for (N,alpha,beta) = ({0:d}, {1:1.6f}, {2:1.6f})'.format(N, alpha, beta)
 
         self.assertAlmostEqual(np.linalg.norm(G-np.eye(N), ord=np.inf), 0, delta = delta, msg=errstr)
-        
+
+    def test_gq_modification_composite_parallel(self):
+        """ gq_modification_composite with a thread pool
+        The parallel evaluation should reproduce the serial sum.
+        """
+
+        alpha = -1. + 6*np.random.rand()
+        beta  = -1. + 6*np.random.rand()
+
+        integrand = lambda x: jacobi_weight_normalized(x, alpha, beta)*np.cos(3*x)
+
+        subintervals = quad.compute_subintervals(-1., 1., [[-1., 0., beta], [-0.5, 0., 0.], [0.2, 0., 0.], [1., alpha, 0.]])
+
+        kwargs = {'roots': np.array([0.1]), 'quadroots': np.array([-0.3])}
+        serial = quad.gq_modification_composite(integrand, -1, 1, 10, subintervals=subintervals, **kwargs)
+        parallel = quad.gq_modification_composite(integrand, -1, 1, 10, subintervals=subintervals, parallel=True, **kwargs)
+
+        self.assertAlmostEqual(serial, parallel, delta = 1e-14*max(1., abs(serial)))
+
+    def test_gq_modification_vector(self):
+        """ gq_modification_composite with a vector-valued integrand
+        Each column should match the corresponding scalar integral.
+        """
+
+        alpha = -1. + 6*np.random.rand()
+        beta  = -1. + 6*np.random.rand()
+
+        K = 5
+        subintervals = quad.compute_subintervals(-1., 1., [[-1., 0., beta], [0., 0., 0.], [1., alpha, 0.]])
+
+        integrand = lambda x: jacobi_weight_normalized(x, alpha, beta)[:,np.newaxis] * np.vander(x, K, increasing=True)
+        mvec = quad.gq_modification_composite(integrand, -1, 1, 10, subintervals=subintervals)
+
+        m = np.zeros(K)
+        for k in range(K):
+            integrand = lambda x: jacobi_weight_normalized(x, alpha, beta) * x**k
+            m[k] = quad.gq_modification_composite(integrand, -1, 1, 10, subintervals=subintervals)
+
+        self.assertAlmostEqual(np.linalg.norm(mvec-m, ord=np.inf), 0, delta = 1e-10)
+
+    def test_compute_subintervals(self):
+        """ compute_subintervals partitioning
+        Singularities outside [a,b] are discarded, interior ones split the
+        interval, and endpoint singularities set the boundary strengths.
+        """
+
+        singularity_list = [[0.5, 0.1, 0.2], [-2., 1., 1.], [-1., 0., -0.5],
+                            [0., 0.3, 0.4]]
+        subintervals = quad.compute_subintervals(-1., 1., singularity_list)
+
+        expected = np.array([[-1., 0., -0.5, 0.3],
+                             [0., 0.5, 0.4, 0.1],
+                             [0.5, 1., 0.2, 0.]])
+
+        self.assertAlmostEqual(np.linalg.norm(subintervals-expected, ord=np.inf), 0, delta = 1e-14)
+
+        subintervals = quad.compute_subintervals(-1., 1., [])
+        self.assertAlmostEqual(np.linalg.norm(subintervals-np.array([[-1., 1., 0., 0.]]), ord=np.inf), 0, delta = 1e-14)
+
+        with self.assertRaises(ValueError):
+            quad.compute_subintervals(-1., 1., [[0., 0., 0.], [0., 1., 1.]])
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -1,8 +1,13 @@
 import unittest
 
 import numpy as np
+from scipy import special as sp
 
-from UncertainSCI.ttr import predict_correct_unbounded, lanczos_stable
+from UncertainSCI.ttr import predict_correct_bounded, predict_correct_unbounded, \
+        predict_correct_discrete, predict_correct_bounded_composite, \
+        predict_correct_unbounded_composite, stieltjes_bounded, \
+        stieltjes_unbounded, stieltjes_discrete, stieltjes_bounded_composite, \
+        stieltjes_unbounded_composite, lanczos_stable
 from UncertainSCI.utils.verify_orthonormal import verify_orthonormal
 from UncertainSCI.families import JacobiPolynomials
 from UncertainSCI.opoly1d import gauss_quadrature_driver
@@ -58,6 +63,71 @@ class TTRTestCase(unittest.TestCase):
         errstr = 'Failed for N = {0:d}'.format(N)
         self.assertAlmostEqual(e_pc, 0, delta = delta, msg=errstr)
 
+    def test_pc_resume(self):
+        """
+        resuming the PC and Stieltjes algorithms from a shorter set of
+        recurrence coefficients reproduces the coefficients of a full run
+        """
+        N = 10
+
+        bounded = lambda x: (1-x)**0.6 * (1+x)**-0.3
+        bounded_args = (-1., 1., bounded, N, [[-1., 0., -0.3], [1., 0.6, 0.]])
+        unbounded = lambda x: np.exp(-x**2)
+        unbounded_args = (-np.inf, np.inf, unbounded, N, [])
+        xg = np.arange(2*N) / (2*N)
+        wg = np.ones(2*N) / (2*N)
+        discrete_args = (xg, wg, N)
+
+        routines = [(predict_correct_bounded, bounded_args),
+                    (predict_correct_unbounded, unbounded_args),
+                    (predict_correct_discrete, discrete_args),
+                    (predict_correct_bounded_composite, bounded_args),
+                    (predict_correct_unbounded_composite, unbounded_args),
+                    (stieltjes_bounded, bounded_args),
+                    (stieltjes_unbounded, unbounded_args),
+                    (stieltjes_discrete, discrete_args),
+                    (stieltjes_bounded_composite, bounded_args),
+                    (stieltjes_unbounded_composite, unbounded_args)]
+
+        delta = 1e-12
+        for routine, args in routines:
+            ab_full = routine(*args)
+            for k in [1, N//2, N-1]:
+                ab_resume = routine(*args, ab_init=ab_full[:k, :])
+
+                errstr = 'Failed for {0:s}, k = {1:d}'.format(routine.__name__, k)
+                self.assertAlmostEqual(np.linalg.norm(ab_resume - ab_full, None), 0, delta = delta, msg=errstr)
+
+    def test_stieltjes_composite(self):
+        """
+        compute the first N recurrence coefficients using the composite
+        Stieltjes procedures for Jacobi and Hermite weight functions
+        """
+        N = 10
+
+        alpha = -1. + 5*np.random.rand(1)[0]
+        beta = -1. + 5*np.random.rand(1)[0]
+        weight = lambda x: (1-x)**alpha * (1+x)**beta
+        singularity_list = [[-1., 0., beta], [1., alpha, 0.]]
+
+        ab_st = stieltjes_bounded_composite(-1., 1., weight, N, singularity_list)
+        ab = JacobiPolynomials(alpha=alpha, beta=beta).recurrence(N-1).copy()
+        ab[0,1] = np.sqrt(2**(alpha+beta+1) * sp.beta(alpha+1, beta+1))
+
+        delta = 1e-8
+        errstr = 'Failed for alpha={0:1.3f}, beta={1:1.3f}, N={2:d}'.format(alpha, beta, N)
+        self.assertAlmostEqual(np.linalg.norm(ab_st - ab, None), 0, delta = delta, msg=errstr)
+
+        weight = lambda x: np.exp(-x**2)
+
+        ab_st = stieltjes_unbounded_composite(-np.inf, np.inf, weight, N, [])
+        ab = np.zeros([N,2])
+        ab[0,1] = np.pi**(1/4)
+        ab[1:,1] = np.sqrt(np.arange(1,N)/2)
+
+        errstr = 'Failed for N = {0:d}'.format(N)
+        self.assertAlmostEqual(np.linalg.norm(ab_st - ab, None), 0, delta = delta, msg=errstr)
+
     # def test_orthogonality(self):
         # """
         # verify the orthogonality of polynomials evaluated by